@@ -0,0 +1,238 @@
+import hashlib
+import json
+import zlib
+
+# Analysis outputs are kept out of the hot `applications` table and stored
+# compressed in `analysis_results`, one row per (application_id, step).
+# Both the FastAPI backend and the optimiser agent's DB tool go through
+# these helpers so the on-disk format stays in one place.
+
+SCHEMA_VERSION = 1
+CODEC_ZLIB = "zlib"
+
+# step_name -> legacy column on `applications` (kept for the API response shape)
+STEP_COLUMNS = {
+    'ats_score': 'ats_score_data',
+    'skill_gap': 'skill_gap_data',
+    'resources': 'resource_data',
+    'enhanced_resume': 'enhanced_resume_data'
+}
+
+
+# What each step reads: 'base' is the (resume, JD) pair, other entries are
+# upstream step outputs. A step only needs to rerun when these inputs change.
+STEP_INPUTS = {
+    'ats_score': ('base',),
+    'skill_gap': ('base',),
+    'resources': ('skill_gap',),
+    'enhanced_resume': ('base', 'ats_score')
+}
+
+
+def encode_result(result_data: str) -> bytes:
+    """Compresses a serialized JSON result for storage."""
+    return zlib.compress(result_data.encode('utf-8'), 6)
+
+
+def decode_result(payload: bytes, codec: str = CODEC_ZLIB) -> str:
+    """Returns the serialized JSON string for a stored result."""
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload).decode('utf-8')
+    raise ValueError(f"Unknown analysis result codec '{codec}'")
+
+
+def _reject_constant(name: str):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def loads_strict(data: str):
+    """
+    json.loads that also rejects NaN/Infinity. Stored results are spliced into
+    API responses without re-encoding, so they must be strict JSON.
+    """
+    return json.loads(data, parse_constant=_reject_constant)
+
+
+def to_strict_json(data: str, fallback: str = "null") -> str:
+    """`data` if it is strict JSON; otherwise NaN/Infinity become null, or `fallback` if unparseable."""
+    try:
+        loads_strict(data)
+        return data
+    except ValueError:
+        pass
+    try:
+        return json.dumps(json.loads(data, parse_constant=lambda _: None))
+    except ValueError:
+        return fallback
+
+
+def base_input_hash(resume_json: str, jd_hash: str) -> str:
+    """Hash of the (resume version, job description) pair every analysis starts from."""
+    return hashlib.sha256(f"{resume_json}\0{jd_hash}".encode('utf-8')).hexdigest()
+
+
+def _canonical(result_data: str) -> str:
+    # Formatting differences in an upstream result should not invalidate downstream steps
+    try:
+        return json.dumps(json.loads(result_data), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return result_data.strip()
+
+
+def step_input_hash(step_name: str, base_hash, results: dict):
+    """
+    Hash of everything `step_name` reads, given the base hash and the current
+    {step_name: json_string} results. Returns None if an input is not available.
+    """
+    h = hashlib.sha256(f"v{SCHEMA_VERSION}:{step_name}".encode('utf-8'))
+    for source in STEP_INPUTS[step_name]:
+        value = base_hash if source == 'base' else results.get(source)
+        if not value:
+            return None
+        h.update(b"\0" + (value if source == 'base' else _canonical(value)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def fresh_steps(base_hash: str, stored: dict) -> set:
+    """
+    Steps whose stored result was computed from the current inputs.
+    `stored` maps step_name -> (input_hash, json_string).
+    """
+    results = {step: data for step, (_, data) in stored.items()}
+    fresh = set()
+    for step_name in STEP_COLUMNS:
+        if step_name not in stored:
+            continue
+        if any(dep != 'base' and dep not in fresh for dep in STEP_INPUTS[step_name]):
+            continue
+        input_hash = stored[step_name][0]
+        if input_hash and input_hash == step_input_hash(step_name, base_hash, results):
+            fresh.add(step_name)
+    return fresh
+
+
+def extract_keywords(step_name: str, result_data: str):
+    """
+    Plain-text missing keywords of an ATS result, kept uncompressed next to the
+    payload so the search index triggers can read them. None for other steps.
+    """
+    if step_name != 'ats_score':
+        return None
+    try:
+        keywords = json.loads(result_data).get("missing_keywords") or []
+    except (ValueError, AttributeError):
+        return None
+    return " ".join(str(k) for k in keywords)
+
+
+UPSERT_SQL = """
+    INSERT INTO analysis_results (application_id, step, schema_version, codec, payload, input_hash, keywords, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(application_id, step) DO UPDATE SET
+        schema_version = excluded.schema_version,
+        codec = excluded.codec,
+        payload = excluded.payload,
+        input_hash = excluded.input_hash,
+        keywords = excluded.keywords,
+        updated_at = excluded.updated_at
+"""
+
+
+def upsert_result(cursor, application_id: int, step_name: str, result_data: str, input_hash=None):
+    """Writes one step result using a raw sqlite3 cursor."""
+    cursor.execute(
+        UPSERT_SQL,
+        (application_id, step_name, SCHEMA_VERSION, CODEC_ZLIB, encode_result(result_data), input_hash,
+         extract_keywords(step_name, result_data))
+    )
+
+
+# Columns added to `analysis_results` after it was first created
+ADDED_COLUMNS = {
+    'input_hash': 'VARCHAR',  # step caching
+    'keywords': 'TEXT'        # search index
+}
+
+
+def migrate_result_columns(conn):
+    """Adds any `ADDED_COLUMNS` missing from an existing `analysis_results` table."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(analysis_results)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, column_type in ADDED_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE analysis_results ADD COLUMN {column} {column_type}")
+    conn.commit()
+
+
+def backfill_keywords(conn):
+    """
+    Fills `keywords` for ATS results stored before the column existed (or before
+    it was populated), so the search index can pick them up. Safe to run repeatedly.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT application_id, payload, codec FROM analysis_results WHERE step = 'ats_score' AND keywords IS NULL")
+    rows = cursor.fetchall()
+    for application_id, payload, codec in rows:
+        try:
+            keywords = extract_keywords('ats_score', decode_result(payload, codec))
+        except (ValueError, zlib.error):
+            keywords = None
+        # '' marks "no keywords" so unreadable results aren't retried on every start
+        cursor.execute(
+            "UPDATE analysis_results SET keywords = ? WHERE application_id = ? AND step = 'ats_score'",
+            (keywords or '', application_id)
+        )
+    conn.commit()
+    return len(rows)
+
+
+def migrate_strict_json(conn):
+    """
+    Rewrites stored results that are not strict JSON (NaN/Infinity, written before
+    writes were validated). Returns the number of rows changed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT application_id, step, payload, codec FROM analysis_results")
+    changed = 0
+    for application_id, step_name, payload, codec in cursor.fetchall():
+        result_data = decode_result(payload, codec)
+        strict = to_strict_json(result_data)
+        if strict != result_data:
+            cursor.execute(
+                "UPDATE analysis_results SET codec = ?, payload = ? WHERE application_id = ? AND step = ?",
+                (CODEC_ZLIB, encode_result(strict), application_id, step_name)
+            )
+            changed += 1
+    conn.commit()
+    return changed
+
+
+def migrate_legacy_columns(conn):
+    """
+    Moves analysis JSON still stored inline on `applications` into
+    `analysis_results`, then drops the old columns. Safe to run repeatedly.
+    `conn` is a DB-API connection (sqlite3 or SQLAlchemy's raw connection).
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(applications)")
+    existing = {row[1] for row in cursor.fetchall()}
+    legacy = {step: col for step, col in STEP_COLUMNS.items() if col in existing}
+    if not legacy:
+        return 0
+
+    moved = 0
+    for step_name, column in legacy.items():
+        cursor.execute(f"SELECT id, {column} FROM applications WHERE {column} IS NOT NULL")
+        for application_id, result_data in cursor.fetchall():
+            upsert_result(cursor, application_id, step_name, result_data)
+            moved += 1
+
+    for column in legacy.values():
+        try:
+            cursor.execute(f"ALTER TABLE applications DROP COLUMN {column}")
+        except Exception:
+            # SQLite < 3.35 has no DROP COLUMN; at least release the data.
+            cursor.execute(f"UPDATE applications SET {column} = NULL")
+    conn.commit()
+    return moved
@@ -0,0 +1,85 @@
+"""
+Compares the old and new serialization paths for GET /api/profile/{user_id}.
+
+  stdlib   : json.loads(stored resume_data) -> FastAPI re-encodes the dict with json
+  orjson   : orjson.loads + orjson.dumps (decode/re-encode, faster codec)
+  raw      : stored bytes spliced into the response without decoding
+
+Usage (from backend/):
+    python benchmarks/bench_json.py [--experience 40] [--seconds 2]
+"""
+import argparse
+import json
+import time
+
+import orjson
+
+
+def make_resume(n_experience: int) -> dict:
+    bullet = "Designed and shipped a distributed data pipeline processing millions of events per day. "
+    return {
+        "personal_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "555-0100",
+                          "location": "Remote", "linkedin": "linkedin.com/in/janedoe"},
+        "education": [{"institution": f"University {i}", "degree": "Bachelor of Engineering",
+                       "cgpa": "9.1", "location": "City", "period": "2016 - 2020"} for i in range(3)],
+        "experience": [{"company": f"Company {i}", "role": "Senior Engineer", "location": "Remote",
+                        "period": "January 2020 - Present",
+                        "responsibilities": [bullet * 2 for _ in range(8)]} for i in range(n_experience)],
+        "projects": [{"name": f"Project {i}", "tech_stack": ["Python", "FastAPI", "React.js"],
+                      "description": bullet * 3, "achievement": "Cut latency by 40%"} for i in range(n_experience)],
+        "skills": {"languages": ["Python", "Go", "TypeScript"], "web_technologies": ["React.js"],
+                   "databases": ["SQLite", "PostgreSQL"], "tools_and_software": ["Docker"],
+                   "ai_ml": ["PyTorch"], "cloud": ["Google Cloud Platform"], "soft_skills": ["Mentoring"]},
+        "certifications": [f"Certification {i}" for i in range(10)],
+        "achievements": [bullet for _ in range(10)],
+    }
+
+
+def stdlib_path(stored: str) -> bytes:
+    body = {"full_name": "Jane Doe", "email": "jane@example.com", "phone": "555-0100",
+            "resume_data": json.loads(stored)}
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_path(stored: str) -> bytes:
+    body = {"full_name": "Jane Doe", "email": "jane@example.com", "phone": "555-0100",
+            "resume_data": orjson.loads(stored)}
+    return orjson.dumps(body)
+
+
+def raw_path(stored: str) -> bytes:
+    # Same splice as main.raw_json_response
+    data = {"full_name": "Jane Doe", "email": "jane@example.com", "phone": "555-0100"}
+    members = [orjson.dumps(k) + b":" + orjson.dumps(v) for k, v in data.items()]
+    members.append(orjson.dumps("resume_data") + b":" + stored.encode("utf-8"))
+    return b"{" + b",".join(members) + b"}"
+
+
+def throughput(fn, stored: str, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn(stored)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experience", type=int, default=40, help="number of experience/project entries")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per path")
+    args = parser.parse_args()
+
+    stored = json.dumps(make_resume(args.experience))
+    assert json.loads(raw_path(stored)) == json.loads(stdlib_path(stored))
+    print(f"resume_data size: {len(stored) / 1024:.1f} KiB")
+
+    baseline = None
+    for name, fn in (("stdlib", stdlib_path), ("orjson", orjson_path), ("raw", raw_path)):
+        ops = throughput(fn, stored, args.seconds)
+        baseline = baseline or ops
+        print(f"{name:>7}: {ops:10.0f} req/s  ({ops / baseline:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the two PDF rendering backends used by generate_pdf:
+
+  html      : Jinja template + xhtml2pdf (templates/resume_template.html)
+  reportlab : native ReportLab flowables (pdf_reportlab.py)
+
+Reports render time per resume and per page, and checks output parity by
+extracting the text of both PDFs and verifying every field of the resume
+appears in each.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf.py [--experience 4] [--runs 10]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypdf import PdfReader
+
+from bench_json import make_resume
+import main
+
+
+def expected_strings(resume: dict) -> list:
+    """Every value the template prints, plus the section headings."""
+    values = ["education", "experience", "projects", "technical skills",
+              "courses & certifications", "achievements & co-curricular"]
+
+    def walk(node):
+        if isinstance(node, dict):
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+        elif node not in (None, ""):
+            values.append(str(node))
+
+    walk({k: v for k, v in resume.items() if k != "personal_info"})
+    info = resume["personal_info"]
+    values += [info["name"], info["email"], info["phone"], info["location"]]
+    return values
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text).lower()
+
+
+def pdf_text(pdf_bytes: bytes):
+    reader = PdfReader(BytesIO(pdf_bytes))
+    return len(reader.pages), normalize("".join(page.extract_text() for page in reader.pages))
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--experience", type=int, default=4, help="number of experience/project entries")
+    parser.add_argument("--runs", type=int, default=10, help="renders per backend")
+    args = parser.parse_args()
+
+    resume = make_resume(args.experience)
+    expected = expected_strings(resume)
+    parity_ok = True
+
+    for backend in main.PDF_RENDER_BACKENDS:
+        main.render_resume(resume, backend)  # warm up template/style caches and imports
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            pdf_bytes = main.render_resume(resume, backend)
+            timings.append(time.perf_counter() - start)
+
+        pages, text = pdf_text(pdf_bytes)
+        missing = [value for value in expected if normalize(value) not in text]
+        parity_ok = parity_ok and not missing
+        per_resume = statistics.median(timings) * 1000
+        print(f"{backend:>10}: {per_resume:8.1f} ms/resume  {per_resume / pages:8.1f} ms/page  "
+              f"({pages} pages, {len(pdf_bytes) / 1024:.0f} KiB)")
+        for value in missing[:5]:
+            print(f"{'':>12}missing: {value[:60]!r}")
+
+    print("parity: OK" if parity_ok else "parity: MISMATCH")
+    return 0 if parity_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_())
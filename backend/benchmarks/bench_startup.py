@@ -0,0 +1,90 @@
+"""
+Measures backend startup cost: wall time of `import main` in a fresh interpreter
+and the import time of each module main pulls in, as reported by `python -X importtime`.
+
+Heavy dependencies are loaded lazily by the routes that need them; pass
+--lazy to also time them individually so the deferred cost is visible.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--lazy]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ["bcrypt", "pypdf", "jinja2", "google.genai", "xhtml2pdf.pisa"]
+
+
+def run_python(code: str, importtime: bool = False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", code]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def child_import_times(stderr: str, root: str = "main") -> dict:
+    """
+    Cumulative microseconds per package imported directly by `root`, from
+    -X importtime output.
+    """
+    totals = {}
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, rest = line.partition("import time:")
+        _self_us, cumulative_us, name = rest.split("|")
+        # The name follows one space plus two spaces per nesting level. A module's
+        # line comes after the lines of everything it imported
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            package = name.strip().split(".")[0]
+            children[package] = children.get(package, 0) + int(cumulative_us)
+        elif depth == 0:
+            if name.strip() == root:
+                totals = children
+            children = {}
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument("--lazy", action="store_true", help="also time the lazily imported dependencies")
+    args = parser.parse_args()
+
+    baseline, _ = run_python("pass")
+    walls = [run_python("import main")[0] for _ in range(args.runs)]
+    print(f"interpreter startup: {baseline * 1000:7.1f} ms")
+    print(f"import main (median of {args.runs}): {statistics.median(walls) * 1000:7.1f} ms")
+
+    _, stderr = run_python("import main", importtime=True)
+    totals = child_import_times(stderr)
+    print(f"\ntop {args.top} modules imported by main, by cumulative import time:")
+    for package, us in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {package:<30} {us / 1000:8.1f} ms")
+
+    if args.lazy:
+        print("\ndeferred to first use:")
+        for module in LAZY_MODULES:
+            try:
+                elapsed, _ = run_python(f"import {module}")
+            except RuntimeError:
+                print(f"  {module:<30} (not installed)")
+                continue
+            print(f"  {module:<30} {(elapsed - baseline) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import random
+import re
+from array import array
+
+import mmh3
+
+# MinHash signatures over word shingles of a job description, plus LSH banding so
+# near-identical JDs (same posting on another board, light edits) can be found
+# without comparing against every stored JD.
+#
+# NUM_PERM = BANDS * ROWS. Two JDs with Jaccard similarity s share at least one
+# bucket with probability 1 - (1 - s^ROWS)^BANDS (see candidate_probability).
+# With 32 bands of 4 rows that is 0.87 at s = 0.5, 0.99 at 0.6 and ~1 from 0.7 up,
+# so thresholds of 0.6 and above lose almost no matches. Candidates are then
+# checked against the threshold using the full signature.
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1729)  # fixed seed: signatures must be stable across processes
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str) -> set:
+    words = re.findall(r"\w+", (text or "").lower(), flags=re.UNICODE)
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text: str) -> list:
+    """MinHash signature (NUM_PERM 32-bit values) of the text's word shingles."""
+    hashes = [mmh3.hash(s, signed=False) for s in shingles(text)]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def encode_signature(sig: list) -> bytes:
+    return array('I', sig).tobytes()
+
+
+def decode_signature(payload: bytes) -> list:
+    sig = array('I')
+    sig.frombytes(payload)
+    return sig.tolist()
+
+
+def band_buckets(sig: list) -> list:
+    """(band, bucket) pairs for LSH; two JDs are candidates if any pair matches."""
+    buckets = []
+    for band in range(BANDS):
+        rows = array('I', sig[band * ROWS:(band + 1) * ROWS]).tobytes()
+        buckets.append((band, mmh3.hash64(rows, signed=True)[0]))
+    return buckets
+
+
+def candidate_probability(similarity: float) -> float:
+    """Chance that two JDs with this Jaccard similarity share an LSH bucket."""
+    return 1 - (1 - similarity ** ROWS) ** BANDS
+
+
+def similarity(sig_a: list, sig_b: list) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def backfill_signatures(conn):
+    """
+    Computes signatures and LSH buckets for stored JDs that don't have them yet,
+    and re-buckets every stored signature if the band layout has changed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(job_descriptions)")
+    if "minhash" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE job_descriptions ADD COLUMN minhash BLOB")
+
+    cursor.execute("SELECT MAX(band) FROM jd_lsh_bands")
+    max_band = cursor.fetchone()[0]
+    if max_band is not None and max_band != BANDS - 1:
+        cursor.execute("DELETE FROM jd_lsh_bands")
+        cursor.execute("SELECT id, minhash FROM job_descriptions WHERE minhash IS NOT NULL")
+        for jd_id, payload in cursor.fetchall():
+            cursor.executemany(
+                "INSERT INTO jd_lsh_bands (job_description_id, band, bucket) VALUES (?, ?, ?)",
+                [(jd_id, band, bucket) for band, bucket in band_buckets(decode_signature(payload))]
+            )
+
+    cursor.execute("SELECT id, text FROM job_descriptions WHERE minhash IS NULL")
+    for jd_id, text in cursor.fetchall():
+        sig = signature(text)
+        cursor.execute("UPDATE job_descriptions SET minhash = ? WHERE id = ?", (encode_signature(sig), jd_id))
+        cursor.executemany(
+            "INSERT OR REPLACE INTO jd_lsh_bands (job_description_id, band, bucket) VALUES (?, ?, ?)",
+            [(jd_id, band, bucket) for band, bucket in band_buckets(sig)]
+        )
+    conn.commit()
@@ -1,23 +1,34 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Float, func, desc
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Float, LargeBinary, Index, func, desc, text, and_, or_
 from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-import bcrypt
+from contextlib import asynccontextmanager, AsyncExitStack
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+import zipfile
+import hashlib
 import httpx
 import os
-import json
 import re
 from fastapi import File, UploadFile
-from fastapi.responses import StreamingResponse
-from pypdf import PdfReader
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response
+from starlette.background import BackgroundTask
+import orjson
 from io import BytesIO
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
-from jinja2 import Environment, FileSystemLoader
-from xhtml2pdf import pisa
+import analysis_store
+import scheduler
+import singleflight
+import search_index
+import jd_minhash
+
+# Heavy dependencies (bcrypt, pypdf, google.genai, jinja2, xhtml2pdf/reportlab) are
+# imported on first use inside the routes that need them, keeping worker startup fast.
 
 load_dotenv()
 
@@ -47,14 +58,50 @@ class Application(Base):
     company_name = Column(String)
     role = Column(String)
     status = Column(String) # Applied, Interview Prep, Offer
-    job_description = Column(Text)
-    # New columns for Analysis Agent results
-    ats_score_data = Column(Text, nullable=True)      # JSON: {score, match_reasons, missing_keywords}
-    skill_gap_data = Column(Text, nullable=True)      # JSON: {missing_hard_skills, missing_soft_skills}
-    resource_data = Column(Text, nullable=True)       # JSON: {recommended_courses, recommended_videos}
-    enhanced_resume_data = Column(Text, nullable=True) # JSON: {optimized_resume_data, improvement_summary}
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id"), index=True)
+    analysis_resume_hash = Column(String, nullable=True) # resume version the stored analysis was run against
     created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="applications")
+    job_description_ref = relationship("JobDescription")
+
+    @property
+    def job_description(self):
+        return self.job_description_ref.text if self.job_description_ref else None
+
+def normalize_job_description(text: str) -> str:
+    """Whitespace/case-insensitive form of a JD, so re-pasted copies hash the same."""
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class JobDescription(Base):
+    # Content-addressed: each distinct (normalized) JD is stored once
+    __tablename__ = "job_descriptions"
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True)
+    text = Column(Text)
+    minhash = Column(LargeBinary, nullable=True) # MinHash signature of the text, for near-duplicate lookup
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class JobDescriptionBand(Base):
+    # LSH buckets of each JD's MinHash signature (see jd_minhash)
+    __tablename__ = "jd_lsh_bands"
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(Integer)
+    __table_args__ = (Index("ix_jd_lsh_bands_band_bucket", "band", "bucket"),)
+
+class AnalysisResult(Base):
+    __tablename__ = "analysis_results"
+    application_id = Column(Integer, ForeignKey("applications.id"), primary_key=True)
+    step = Column(String, primary_key=True)  # ats_score, skill_gap, resources, enhanced_resume
+    schema_version = Column(Integer, default=analysis_store.SCHEMA_VERSION)
+    codec = Column(String, default=analysis_store.CODEC_ZLIB)
+    payload = Column(LargeBinary)            # compressed JSON string
+    input_hash = Column(String, nullable=True) # hash of the inputs this result was computed from
+    keywords = Column(Text, nullable=True)     # plain missing keywords (ats_score only), for search
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class InterviewSession(Base):
     __tablename__ = "interview_sessions"
@@ -65,7 +112,93 @@ class InterviewSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="sessions")
 
-Base.metadata.create_all(bind=engine)
+def migrate_job_descriptions(conn):
+    """
+    Adds the JD reference columns to an existing `applications` table and moves
+    inline `job_description` text into `job_descriptions`. Safe to run repeatedly.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(applications)")
+    existing = {row[1] for row in cursor.fetchall()}
+    if "job_description_id" not in existing:
+        cursor.execute("ALTER TABLE applications ADD COLUMN job_description_id INTEGER REFERENCES job_descriptions(id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_applications_job_description_id ON applications (job_description_id)")
+    if "analysis_resume_hash" not in existing:
+        cursor.execute("ALTER TABLE applications ADD COLUMN analysis_resume_hash VARCHAR")
+
+    if "job_description" in existing:
+        cursor.execute("SELECT id, job_description FROM applications WHERE job_description IS NOT NULL AND job_description_id IS NULL")
+        for application_id, jd_text in cursor.fetchall():
+            digest = content_hash(normalize_job_description(jd_text))
+            cursor.execute(
+                "INSERT OR IGNORE INTO job_descriptions (content_hash, text, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (digest, jd_text)
+            )
+            cursor.execute("SELECT id FROM job_descriptions WHERE content_hash = ?", (digest,))
+            cursor.execute("UPDATE applications SET job_description_id = ? WHERE id = ?", (cursor.fetchone()[0], application_id))
+        try:
+            cursor.execute("ALTER TABLE applications DROP COLUMN job_description")
+        except Exception:
+            cursor.execute("UPDATE applications SET job_description = NULL")
+    conn.commit()
+
+# Bump when a step is added to run_migrations; stored in SQLite's PRAGMA user_version
+DB_SCHEMA_VERSION = 2
+
+def migrate_strict_resume_json(conn):
+    """Rewrites stored resume_data that is not strict JSON; it is served to clients as-is."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, resume_data FROM users WHERE resume_data IS NOT NULL")
+    for user_id, resume_data in cursor.fetchall():
+        strict = analysis_store.to_strict_json(resume_data, fallback="{}")
+        if strict != resume_data:
+            cursor.execute("UPDATE users SET resume_data = ? WHERE id = ?", (strict, user_id))
+    conn.commit()
+
+def get_schema_version(conn) -> int:
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA user_version")
+    return cursor.fetchone()[0]
+
+def run_migrations():
+    """
+    Brings the database schema up to DB_SCHEMA_VERSION. Run once per deploy,
+    before any worker starts (`python migrate.py`); the steps ALTER tables and
+    rebuild indexes, so workers must not race each other through them.
+    """
+    Base.metadata.create_all(bind=engine)
+    raw_conn = engine.raw_connection()
+    try:
+        if get_schema_version(raw_conn) >= DB_SCHEMA_VERSION:
+            return False
+        analysis_store.migrate_result_columns(raw_conn)
+        # Move analysis JSON from old inline `applications` columns into `analysis_results`
+        analysis_store.migrate_legacy_columns(raw_conn)
+        migrate_job_descriptions(raw_conn)
+        jd_minhash.backfill_signatures(raw_conn)
+        # Before the search index is built, which reads the keywords
+        analysis_store.backfill_keywords(raw_conn)
+        search_index.create_search_index(raw_conn)
+        # Stored JSON is spliced into responses unparsed; older writers let NaN/Infinity through
+        analysis_store.migrate_strict_json(raw_conn)
+        migrate_strict_resume_json(raw_conn)
+        raw_conn.cursor().execute(f"PRAGMA user_version = {DB_SCHEMA_VERSION}")
+        raw_conn.commit()
+        return True
+    finally:
+        raw_conn.close()
+
+def check_schema_version():
+    raw_conn = engine.raw_connection()
+    try:
+        version = get_schema_version(raw_conn)
+    finally:
+        raw_conn.close()
+    if version < DB_SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {DB_SCHEMA_VERSION}. "
+            "Run `python migrate.py` from backend/ before starting the server."
+        )
 
 # --- Schemas ---
 class UserCreate(BaseModel):
@@ -108,14 +241,39 @@ class ApplicationCreate(BaseModel):
 # --- Security ---
 
 def verify_password(plain_password, hashed_password):
+    import bcrypt
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password):
+    import bcrypt
     salt = bcrypt.gensalt()
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
+# --- JSON Responses ---
+
+def raw_json_response(data: dict, raw_fields: dict) -> Response:
+    """
+    Builds a JSON object response where `raw_fields` values are already-serialized
+    JSON (e.g. stored columns) and are spliced in as-is instead of being decoded
+    and re-encoded.
+    """
+    members = [orjson.dumps(key) + b":" + orjson.dumps(value) for key, value in data.items()]
+    for key, raw in raw_fields.items():
+        if isinstance(raw, str):
+            raw = raw.encode('utf-8')
+        members.append(orjson.dumps(key) + b":" + (raw or b"null"))
+    return Response(content=b"{" + b",".join(members) + b"}", media_type="application/json")
+
 # --- App Setup ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Migrations run once as a separate step (migrate.py); workers only create missing
+    # tables and refuse to start against an outdated schema
+    Base.metadata.create_all(bind=engine)
+    check_schema_version()
+    yield
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -126,6 +284,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Shared admission control for every endpoint that calls the model
+llm_scheduler = scheduler.Scheduler()
+# Coalesces identical in-flight analysis/PDF requests
+inflight = singleflight.SingleFlight()
+
+@app.exception_handler(scheduler.Rejected)
+async def scheduler_rejected_handler(request: Request, exc: scheduler.Rejected):
+    return ORJSONResponse(
+        status_code=429,
+        content={"detail": f"{exc.reason}. Please retry in {exc.retry_after}s."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.get("/api/metrics/scheduler")
+def scheduler_metrics():
+    return llm_scheduler.metrics()
+
+@app.get("/api/metrics/singleflight")
+def singleflight_metrics():
+    return inflight.metrics()
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -179,19 +358,16 @@ def get_profile(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    resume_data = {}
-    if user.resume_data:
-        try:
-            resume_data = json.loads(user.resume_data)
-        except json.JSONDecodeError:
-            resume_data = {}
-
-    return {
-        "full_name": user.full_name,
-        "email": user.email,
-        "phone": user.phone,
-        "resume_data": resume_data
-    }
+    # resume_data is only ever written as strict JSON (orjson, or validated by the agent
+    # tools; older rows are fixed by migrate_strict_resume_json), so pass it through untouched
+    return raw_json_response(
+        {
+            "full_name": user.full_name,
+            "email": user.email,
+            "phone": user.phone
+        },
+        {"resume_data": user.resume_data or "{}"}
+    )
 
 @app.put("/api/profile/{user_id}")
 def update_profile(user_id: int, update_data: UserUpdate, db: Session = Depends(get_db)):
@@ -199,7 +375,7 @@ def update_profile(user_id: int, update_data: UserUpdate, db: Session = Depends(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user.resume_data = json.dumps(update_data.resume_data)
+    user.resume_data = orjson.dumps(update_data.resume_data).decode('utf-8')
     db.commit()
     
     return {"message": "Profile updated successfully"}
@@ -271,24 +447,116 @@ def get_interview_history(user_id: int, db: Session = Depends(get_db)):
     return history
 
 
+def get_or_create_job_description(db: Session, text: str) -> JobDescription:
+    """Returns the stored JD with the same normalized content, inserting it if new."""
+    digest = content_hash(normalize_job_description(text))
+    jd = db.query(JobDescription).filter(JobDescription.content_hash == digest).first()
+    if jd:
+        return jd
+    signature = jd_minhash.signature(text)
+    jd = JobDescription(content_hash=digest, text=text, minhash=jd_minhash.encode_signature(signature))
+    db.add(jd)
+    try:
+        db.flush()
+        db.add_all(
+            JobDescriptionBand(job_description_id=jd.id, band=band, bucket=bucket)
+            for band, bucket in jd_minhash.band_buckets(signature)
+        )
+        db.flush()
+    except IntegrityError:
+        # Another request stored the same JD first
+        db.rollback()
+        jd = db.query(JobDescription).filter(JobDescription.content_hash == digest).first()
+    return jd
+
 @app.post("/api/applications")
 def create_application(application: ApplicationCreate, db: Session = Depends(get_db)):
+    jd = get_or_create_job_description(db, application.job_description)
     db_application = Application(
         user_id=application.user_id,
         company_name=application.company_name,
         role=application.role,
         status=application.status,
-        job_description=application.job_description
+        job_description_id=jd.id
     )
     db.add(db_application)
     db.commit()
     db.refresh(db_application)
     return {"message": "Application created", "id": db_application.id}
 
+def load_analysis_results(db: Session, application_id: int, steps=None) -> dict:
+    """Returns {step_name: json_string} for the stored analysis results of an application."""
+    query = db.query(AnalysisResult).filter(AnalysisResult.application_id == application_id)
+    if steps:
+        query = query.filter(AnalysisResult.step.in_(steps))
+    return {
+        r.step: analysis_store.decode_result(r.payload, r.codec)
+        for r in query.all()
+    }
+
 @app.get("/api/applications/{user_id}")
 def get_applications(user_id: int, db: Session = Depends(get_db)):
-    applications = db.query(Application).filter(Application.user_id == user_id).order_by(desc(Application.created_at)).all()
-    return applications
+    # List view: only the small columns, no JD or analysis blobs
+    rows = db.query(
+        Application.id, Application.user_id, Application.company_name,
+        Application.role, Application.status, Application.created_at
+    ).filter(Application.user_id == user_id).order_by(desc(Application.created_at)).all()
+    return [dict(row._mapping) for row in rows]
+
+@app.get("/api/applications/{user_id}/search")
+def search_applications(user_id: int, q: str = "", status: Optional[str] = None,
+                        page: int = 1, page_size: int = 20, db: Session = Depends(get_db)):
+    """Ranked full-text search over company, role, job description and missing keywords."""
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), 100)
+    params = {"user_id": user_id, "status": status, "limit": page_size, "offset": (page - 1) * page_size}
+
+    match_query = search_index.build_match_query(q)
+    if match_query is None:
+        # No search terms: plain newest-first listing with the same filters and paging
+        query = db.query(
+            Application.id, Application.user_id, Application.company_name,
+            Application.role, Application.status, Application.created_at
+        ).filter(Application.user_id == user_id)
+        if status:
+            query = query.filter(Application.status == status)
+        total = query.count()
+        rows = query.order_by(desc(Application.created_at)).limit(page_size).offset(params["offset"]).all()
+    else:
+        params["query"] = match_query
+        total = db.execute(text(search_index.count_sql(bool(status))), params).scalar()
+        # Typed so created_at comes back as a datetime (ISO in JSON) like the listing branch
+        search = text(search_index.search_sql(bool(status))).columns(created_at=DateTime)
+        rows = db.execute(search, params).all()
+
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": [dict(row._mapping) for row in rows]
+    }
+
+@app.get("/api/applications/{app_id}/detail")
+def get_application_detail(app_id: int, db: Session = Depends(get_db)):
+    application = db.query(Application).filter(Application.id == app_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    results = load_analysis_results(db, app_id)
+    detail = {
+        "id": application.id,
+        "user_id": application.user_id,
+        "company_name": application.company_name,
+        "role": application.role,
+        "status": application.status,
+        "job_description": application.job_description,
+        "created_at": application.created_at,
+    }
+    # Stored results are validated JSON; embed them without decoding
+    return raw_json_response(detail, {
+        column: results.get(step_name)
+        for step_name, column in analysis_store.STEP_COLUMNS.items()
+    })
 
 @app.delete("/api/applications/{app_id}")
 def delete_application(app_id: int, db: Session = Depends(get_db)):
@@ -296,7 +564,14 @@ def delete_application(app_id: int, db: Session = Depends(get_db)):
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
+    jd_id = application.job_description_id
+    db.query(AnalysisResult).filter(AnalysisResult.application_id == app_id).delete(synchronize_session=False)
     db.delete(application)
+    db.flush()
+    # Drop the JD once no application references it anymore
+    if jd_id and not db.query(Application.id).filter(Application.job_description_id == jd_id).first():
+        db.query(JobDescriptionBand).filter(JobDescriptionBand.job_description_id == jd_id).delete(synchronize_session=False)
+        db.query(JobDescription).filter(JobDescription.id == jd_id).delete(synchronize_session=False)
     db.commit()
     return {"message": "Application deleted"}
 
@@ -334,7 +609,7 @@ async def init_session(request: InitSessionRequest):
 
 @app.post("/api/chat")
 async def chat(request: ChatRequest):
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with llm_scheduler.slot(f"user:{request.userId}", "interactive"), httpx.AsyncClient(timeout=60.0) as client:
         try:
             payload = {
                 "appName": request.appName,
@@ -367,50 +642,110 @@ async def chat(request: ChatRequest):
 OPTIMISER_AGENT_URL = "http://127.0.0.1:8008"
 import uuid
 
+# Near-duplicate JDs (estimated Jaccard similarity of word shingles) above this
+# threshold get the earlier application's results offered instead of a new run.
+# Recall floor: LSH only surfaces pairs that share a bucket, with probability
+# jd_minhash.candidate_probability(s): 0.99 at 0.6, 0.87 at 0.5, 0.56 at 0.4.
+# Thresholds below 0.6 miss a growing share of matches.
+JD_SIMILARITY_THRESHOLD = float(os.getenv("JD_SIMILARITY_THRESHOLD", "0.8"))
+if jd_minhash.candidate_probability(JD_SIMILARITY_THRESHOLD) < 0.95:
+    print(f"Warning: JD_SIMILARITY_THRESHOLD={JD_SIMILARITY_THRESHOLD} is below the LSH recall floor; "
+          f"only ~{jd_minhash.candidate_probability(JD_SIMILARITY_THRESHOLD):.0%} of matches at that similarity are found")
+# Steps that carry over between near-identical JDs; the enhanced resume is JD-specific
+SIMILAR_REUSE_STEPS = ("ats_score", "skill_gap", "resources")
+
 class AnalyzeRequest(BaseModel):
     application_id: int
+    fresh: bool = False # skip near-duplicate reuse and run the full analysis
 
-@app.post("/api/analyze_application")
-async def analyze_application(request: AnalyzeRequest, db: Session = Depends(get_db)):
-    # 1. Fetch Application & User Data
-    application = db.query(Application).filter(Application.id == request.application_id).first()
-    if not application:
-        raise HTTPException(status_code=404, detail="Application not found")
-    
-    user = db.query(User).filter(User.id == application.user_id).first()
-    if not user or not user.resume_data:
-        raise HTTPException(status_code=400, detail="User resume not found")
-
-    # 2. Prepare Context
-    resume_text = user.resume_data # This is a JSON string
-    job_description = application.job_description
-    
-    prompt = f"""
-    Please analyze the following application.
-    
-    APPLICATION ID: {request.application_id}
-    
-    JOB DESCRIPTION:
-    {job_description}
-    
-    USER RESUME:
-    {resume_text}
-    
-    Proceed with the sequential analysis (ATS -> Skill Gap -> Resources -> Resume Enhancement).
+def find_reusable_analysis(db: Session, application: Application, resume_hash: str):
     """
-
-    # 3. Call Optimiser Agent (Init Session + Run)
+    Looks for another application of the same user with the same JD whose complete
+    analysis was run against the same resume version. Returns its id or None.
+    """
+    candidates = db.query(Application.id).filter(
+        Application.user_id == application.user_id,
+        Application.job_description_id == application.job_description_id,
+        Application.analysis_resume_hash == resume_hash,
+        Application.id != application.id
+    ).order_by(desc(Application.created_at)).all()
+    for (candidate_id,) in candidates:
+        steps = db.query(func.count(AnalysisResult.step)).filter(AnalysisResult.application_id == candidate_id).scalar()
+        if steps == len(analysis_store.STEP_COLUMNS):
+            return candidate_id
+    return None
+
+def find_similar_analysis(db: Session, application: Application, resume_hash: str):
+    """
+    Looks for another application of the same user whose JD is a near duplicate of
+    this one (LSH candidates, then signature similarity >= JD_SIMILARITY_THRESHOLD)
+    and whose analysis was run against the same resume version.
+    Returns (application_id, similarity) of the closest match, or None.
+    """
+    jd = application.job_description_ref
+    if not jd or not jd.minhash:
+        return None
+    signature = jd_minhash.decode_signature(jd.minhash)
+    buckets = or_(*(
+        and_(JobDescriptionBand.band == band, JobDescriptionBand.bucket == bucket)
+        for band, bucket in jd_minhash.band_buckets(signature)
+    ))
+    candidate_jds = db.query(JobDescriptionBand.job_description_id).filter(buckets).distinct()
+    candidates = db.query(Application.id, JobDescription.minhash).join(
+        JobDescription, JobDescription.id == Application.job_description_id
+    ).filter(
+        Application.user_id == application.user_id,
+        Application.job_description_id.in_(candidate_jds),
+        Application.job_description_id != application.job_description_id,
+        Application.analysis_resume_hash == resume_hash,
+        Application.id != application.id
+    ).order_by(desc(Application.created_at)).all()
+
+    best = None
+    for candidate_id, candidate_minhash in candidates:
+        score = jd_minhash.similarity(signature, jd_minhash.decode_signature(candidate_minhash))
+        if score < JD_SIMILARITY_THRESHOLD or (best and score <= best[1]):
+            continue
+        steps = db.query(func.count(AnalysisResult.step)).filter(
+            AnalysisResult.application_id == candidate_id,
+            AnalysisResult.step.in_(SIMILAR_REUSE_STEPS)
+        ).scalar()
+        if steps == len(SIMILAR_REUSE_STEPS):
+            best = (candidate_id, score)
+    return best
+
+def copy_analysis_results(db: Session, source_id: int, target_id: int, steps=None):
+    """Copies stored (still compressed) step results from one application to another."""
+    db.query(AnalysisResult).filter(AnalysisResult.application_id == target_id).delete(synchronize_session=False)
+    query = db.query(AnalysisResult).filter(AnalysisResult.application_id == source_id)
+    if steps:
+        query = query.filter(AnalysisResult.step.in_(steps))
+    for r in query.all():
+        db.add(AnalysisResult(
+            application_id=target_id,
+            step=r.step,
+            schema_version=r.schema_version,
+            codec=r.codec,
+            payload=r.payload,
+            input_hash=r.input_hash,
+            keywords=r.keywords
+        ))
+
+async def run_optimiser(application_id: int, user_id: int, prompt: str, session_state: dict, resume_hash: str, stale_steps: list):
+    """Runs the optimiser chain in a fresh ADK session (Init Session + Run)."""
     session_id = str(uuid.uuid4())
-    user_id_str = str(user.id)
+    user_id_str = str(user_id)
     app_name = "optimiser_agent"
     
-    async with httpx.AsyncClient(timeout=300.0) as client: # Longer timeout for sequential chain
+    async with llm_scheduler.slot(f"user:{user_id}", "background"), httpx.AsyncClient(timeout=300.0) as client: # Longer timeout for sequential chain
         try:
             # A. Init Session
-            # URL: /apps/{appName}/users/{userId}/sessions/{sessionId}
-            init_url = f"{OPTIMISER_AGENT_URL}/apps/{app_name}/users/{user_id_str}/sessions/{session_id}"
+            # URL: /apps/{appName}/users/{userId}/sessions, body {session_id, state}. (The
+            # /sessions/{sessionId} variant takes the whole body as the state, which would
+            # nest the seeded step cache under state["state"])
+            init_url = f"{OPTIMISER_AGENT_URL}/apps/{app_name}/users/{user_id_str}/sessions"
             print(f"Initializing Session: {init_url}")
-            init_res = await client.post(init_url, json={})
+            init_res = await client.post(init_url, json={"session_id": session_id, "state": session_state})
             init_res.raise_for_status()
             
             # B. Run Agent
@@ -427,10 +762,22 @@ async def analyze_application(request: AnalyzeRequest, db: Session = Depends(get
             print(f"Running Analysis Agent: {run_url}")
             run_res = await client.post(run_url, json=payload)
             run_res.raise_for_status()
+
+            # The chain has written its results; remember which resume version they belong to.
+            # Own session: this may outlive the request that started it (see singleflight)
+            db = SessionLocal()
+            try:
+                db.query(Application).filter(Application.id == application_id).update(
+                    {Application.analysis_resume_hash: resume_hash}, synchronize_session=False
+                )
+                db.commit()
+            finally:
+                db.close()
             
             return {
                 "message": "Analysis started successfully",
                 "session_id": session_id,
+                "stale_steps": stale_steps,
                 "agent_response": run_res.json()
             }
             
@@ -441,13 +788,102 @@ async def analyze_application(request: AnalyzeRequest, db: Session = Depends(get
             raise HTTPException(status_code=500, detail=f"Failed to communicate with Analysis Agent: {str(e)}")
 
 
+@app.post("/api/analyze_application")
+async def analyze_application(request: AnalyzeRequest, db: Session = Depends(get_db)):
+    # 1. Fetch Application & User Data
+    application = db.query(Application).filter(Application.id == request.application_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    user = db.query(User).filter(User.id == application.user_id).first()
+    if not user or not user.resume_data:
+        raise HTTPException(status_code=400, detail="User resume not found")
+
+    # 2. Reuse a finished analysis of the same (resume version, JD) pair if one exists
+    resume_hash = content_hash(user.resume_data)
+    reused_from = find_reusable_analysis(db, application, resume_hash)
+    if reused_from:
+        copy_analysis_results(db, reused_from, application.id)
+        application.analysis_resume_hash = resume_hash
+        db.commit()
+        return {
+            "message": "Analysis reused from an identical application",
+            "reused_from": reused_from
+        }
+
+    # 3. Work out which stored step results are still valid for the current inputs
+    jd_hash = application.job_description_ref.content_hash if application.job_description_ref else ""
+    base_hash = analysis_store.base_input_hash(user.resume_data, jd_hash)
+    stored = {
+        r.step: (r.input_hash, analysis_store.decode_result(r.payload, r.codec))
+        for r in db.query(AnalysisResult).filter(AnalysisResult.application_id == application.id).all()
+    }
+
+    # On a first analysis, offer the results of a near-identical JD right away. They
+    # keep the source's input hashes, so a later `fresh` run recomputes every step
+    if not stored and not request.fresh:
+        similar = find_similar_analysis(db, application, resume_hash)
+        if similar:
+            similar_id, similarity = similar
+            copy_analysis_results(db, similar_id, application.id, steps=SIMILAR_REUSE_STEPS)
+            db.commit()
+            return {
+                "message": "Analysis reused from an application with a near-identical job description",
+                "similar_to": similar_id,
+                "similarity": round(similarity, 3),
+                "reused_steps": list(SIMILAR_REUSE_STEPS),
+                "fresh_analysis_available": True
+            }
+    fresh = analysis_store.fresh_steps(base_hash, stored)
+    if len(fresh) == len(analysis_store.STEP_COLUMNS):
+        return {"message": "Analysis is up to date", "stale_steps": []}
+
+    # Seed the agent session with cached results; each step agent skips itself
+    # when its input hash still matches (see optimiser_agent.skip_if_unchanged)
+    session_state = {"base_input_hash": base_hash}
+    for step_name, (input_hash, result_data) in stored.items():
+        session_state[f"result_{step_name}"] = result_data
+        session_state[f"input_hash_{step_name}"] = input_hash
+
+    # 4. Prepare Context
+    resume_text = user.resume_data # This is a JSON string
+    job_description = application.job_description
+    
+    prompt = f"""
+    Please analyze the following application.
+    
+    APPLICATION ID: {request.application_id}
+    
+    JOB DESCRIPTION:
+    {job_description}
+    
+    USER RESUME:
+    {resume_text}
+    
+    Proceed with the sequential analysis (ATS -> Skill Gap -> Resources -> Resume Enhancement).
+    """
+
+    # 5. Call Optimiser Agent. Identical requests already in flight (double-clicks,
+    # retries) share that run instead of starting a second one
+    stale_steps = [step for step in analysis_store.STEP_COLUMNS if step not in fresh]
+    return await inflight.do(
+        ("analyze_application", application.id, base_hash),
+        lambda: run_optimiser(application.id, user.id, prompt, session_state, resume_hash, stale_steps)
+    )
+
 # --- Resume Upload & Extraction ---
 
+@lru_cache(maxsize=1)
+def get_genai_client():
+    """Shared Gemini client, created (and the SDK imported) on first use."""
+    from google import genai
+    return genai.Client(http_options={'api_version': 'v1alpha'})
+
 def extract_resume_data(text: str) -> dict:
     """
     Uses Gemini to extract structured resume data from text.
     """
-    client = genai.Client(http_options={'api_version': 'v1alpha'})
+    client = get_genai_client()
     
     prompt = """
     You are an expert resume parser. Extract the following details from the resume text below and return ONLY valid JSON matching this schema:
@@ -477,7 +913,7 @@ def extract_resume_data(text: str) -> dict:
                 'response_mime_type': 'application/json'
             }
         )
-        return json.loads(response.text)
+        return orjson.loads(response.text)
     except Exception as e:
         print(f"Extraction Error: {e}")
         return {}
@@ -495,7 +931,7 @@ def save_extracted_data(data: dict, db: Session):
             # We strictly only update existing users
             raise Exception(f"User with email {user_email} not found. Please sign up first.")
             
-        user.resume_data = json.dumps(data)
+        user.resume_data = orjson.dumps(data).decode('utf-8')
         db.commit()
             
         return "resume_updated", user_email, user.full_name
@@ -504,62 +940,64 @@ def save_extracted_data(data: dict, db: Session):
         raise e
 
 @app.post("/api/upload_resume")
-async def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_resume(http_request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)):
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    try:
-        # 1. Read PDF
-        content = await file.read()
-        pdf_reader = PdfReader(BytesIO(content))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+    # The uploader isn't known until the resume is parsed, so limit by client address
+    async with llm_scheduler.slot(f"ip:{http_request.client.host}", "standard"):
+        try:
+            # 1. Read PDF
+            content = await file.read()
+            from pypdf import PdfReader
+            pdf_reader = PdfReader(BytesIO(content))
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text() + "\n"
             
-        # 2. Extract Data
-        extracted_data = extract_resume_data(text)
+            # 2. Extract Data (blocking SDK call, keep it off the event loop)
+            extracted_data = await asyncio.to_thread(extract_resume_data, text)
         
-        if not extracted_data:
-             raise HTTPException(status_code=500, detail="Failed to extract data from resume")
+            if not extracted_data:
+                 raise HTTPException(status_code=500, detail="Failed to extract data from resume")
 
-        # 3. Save Data (Update DB)
-        filename, email, name = save_extracted_data(extracted_data, db)
+            # 3. Save Data (Update DB)
+            filename, email, name = save_extracted_data(extracted_data, db)
         
-        return {
-            "success": True, 
-            "message": "Resume processed successfully",
-            "filename": filename,
-            "extracted_email": email,
-            "extracted_name": name
-        }
+            return {
+                "success": True, 
+                "message": "Resume processed successfully",
+                "filename": filename,
+                "extracted_email": email,
+                "extracted_name": name
+            }
         
-    except Exception as e:
-        print(f"Upload Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        except Exception as e:
+            print(f"Upload Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
 
 # --- PDF Generation ---
 
-@app.post("/api/generate_pdf/{application_id}")
-async def generate_pdf(application_id: int, db: Session = Depends(get_db)):
-    # 1. Fetch Application & Data
-    application = db.query(Application).filter(Application.id == application_id).first()
-    if not application:
-        raise HTTPException(status_code=404, detail="Application not found")
-        
-    user = db.query(User).filter(User.id == application.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+@lru_cache(maxsize=1)
+def get_resume_template():
+    """Loads and compiles the resume template once (jinja2 imported on first use)."""
+    from jinja2 import Environment, FileSystemLoader
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    template_dir = os.path.join(current_dir, "templates")
+    # Ensure template dir exists or use current dir
+    if not os.path.exists(template_dir):
+         os.makedirs(template_dir, exist_ok=True)
 
-    original_resume_json = user.resume_data
-    resume_diff_json = application.enhanced_resume_data
-    
-    if not original_resume_json or not resume_diff_json:
-        raise HTTPException(status_code=400, detail="Resume data or analysis missing. Please run analysis first.")
+    env = Environment(loader=FileSystemLoader(template_dir))
+    return env.get_template("resume_template.html")
 
-    # 2. Merge JSONs using Gemini
-    # We do this to ensure the final JSON perfectly matches the schema even if the Diff was partial
-    client = genai.Client(http_options={'api_version': 'v1alpha'})
+def merge_resume(original_resume_json: str, resume_diff_json: str) -> dict:
+    """
+    Merges the original resume and the enhancer's diff using Gemini.
+    We do this to ensure the final JSON perfectly matches the schema even if the Diff was partial.
+    """
+    client = get_genai_client()
     
     merge_prompt = f"""
     You are a JSON Merge Expert.
@@ -583,52 +1021,241 @@ async def generate_pdf(application_id: int, db: Session = Depends(get_db)):
     Return ONLY the JSON object.
     """
     
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=merge_prompt,
-            config={'response_mime_type': 'application/json'}
-        )
-        final_resume_json = json.loads(response.text)
-        
-    except Exception as e:
-        print(f"Merge Error: {e}")
-        # Fallback: Just use original if merge fails, or maybe try to manual merge? 
-        # For now, let's fail to alert the user.
-        raise HTTPException(status_code=500, detail=f"Failed to merge resume data: {str(e)}")
+    response = client.models.generate_content(
+        model='gemini-2.0-flash',
+        contents=merge_prompt,
+        config={'response_mime_type': 'application/json'}
+    )
+    return orjson.loads(response.text)
 
-    # 3. Render HTML Template
-    try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        template_dir = os.path.join(current_dir, "templates")
-        # Ensure template dir exists or use current dir
-        if not os.path.exists(template_dir):
-             os.makedirs(template_dir, exist_ok=True)
-             
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template("resume_template.html")
-        
-        # Flatten skills if needed for template convenience, though template handles it
-        html_content = template.render(**final_resume_json)
-        
-    except Exception as e:
-        print(f"Template Error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to render PDF template: {str(e)}")
+def render_resume_html(final_resume_json: dict) -> str:
+    template = get_resume_template()
+    # Flatten skills if needed for template convenience, though template handles it
+    return template.render(**final_resume_json)
 
-    # 4. Generate PDF
+def render_resume_pdf(html_content: str) -> bytes:
+    from xhtml2pdf import pisa
     pdf_buffer = BytesIO()
     pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-    
     if pisa_status.err:
-        raise HTTPException(status_code=500, detail="PDF generation failed")
+        raise RuntimeError("PDF generation failed")
+    return pdf_buffer.getvalue()
+
+# "html": Jinja template + xhtml2pdf; "reportlab": native layout in pdf_reportlab (faster)
+PDF_RENDER_BACKENDS = ("html", "reportlab")
+PDF_RENDER_BACKEND = os.getenv("PDF_RENDER_BACKEND", "html")
+
+def render_resume(final_resume_json: dict, backend: Optional[str] = None) -> bytes:
+    """Renders the final resume to PDF bytes with the selected backend."""
+    if (backend or PDF_RENDER_BACKEND) == "reportlab":
+        import pdf_reportlab
+        return pdf_reportlab.render_resume_pdf(final_resume_json)
+    return render_resume_pdf(render_resume_html(final_resume_json))
+
+async def build_pdf(user_id: int, original_resume_json: str, resume_diff_json: str, backend: str) -> bytes:
+    """Merges the resume diff and renders the PDF with the given backend."""
+    # 2. Merge JSONs using Gemini (blocking SDK call, run off the event loop)
+    async with llm_scheduler.slot(f"user:{user_id}", "standard"):
+        try:
+            final_resume_json = await asyncio.to_thread(merge_resume, original_resume_json, resume_diff_json)
+            
+        except Exception as e:
+            print(f"Merge Error: {e}")
+            # Fallback: Just use original if merge fails, or maybe try to manual merge? 
+            # For now, let's fail to alert the user.
+            raise HTTPException(status_code=500, detail=f"Failed to merge resume data: {str(e)}")
+
+    if backend == "reportlab":
+        # 3. Lay out the PDF natively
+        try:
+            pdf_bytes = await asyncio.to_thread(render_resume, final_resume_json, "reportlab")
+        except Exception as e:
+            print(f"ReportLab Error: {e}")
+            raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+    else:
+        # 3. Render HTML Template
+        try:
+            html_content = render_resume_html(final_resume_json)
+            
+        except Exception as e:
+            print(f"Template Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to render PDF template: {str(e)}")
+
+        # 4. Generate PDF
+        try:
+            pdf_bytes = await asyncio.to_thread(render_resume_pdf, html_content)
+        except RuntimeError:
+            raise HTTPException(status_code=500, detail="PDF generation failed")
+
+    return pdf_bytes
+
+@app.post("/api/generate_pdf/{application_id}")
+async def generate_pdf(application_id: int, backend: Optional[str] = None, db: Session = Depends(get_db)):
+    if backend and backend not in PDF_RENDER_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown PDF backend '{backend}'")
+
+    # 1. Fetch Application & Data
+    application = db.query(Application).filter(Application.id == application_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
         
-    pdf_buffer.seek(0)
+    user = db.query(User).filter(User.id == application.user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    original_resume_json = user.resume_data
+    resume_diff_json = load_analysis_results(db, application_id, steps=["enhanced_resume"]).get("enhanced_resume")
+    
+    if not original_resume_json or not resume_diff_json:
+        raise HTTPException(status_code=400, detail="Resume data or analysis missing. Please run analysis first.")
+
+    # 2-4. Merge and render. An identical request already in flight shares its PDF
+    backend = backend or PDF_RENDER_BACKEND
+    pdf_bytes = await inflight.do(
+        ("generate_pdf", application_id, content_hash(f"{original_resume_json}\0{resume_diff_json}\0{backend}")),
+        lambda: build_pdf(user.id, original_resume_json, resume_diff_json, backend)
+    )
     
     filename = f"{user.full_name.replace(' ', '_')}_Optimized_Resume.pdf"
     
     return StreamingResponse(
-        pdf_buffer, 
+        BytesIO(pdf_bytes), 
         media_type="application/pdf", 
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+
+# --- Bulk PDF Export ---
+
+PDF_EXPORT_WORKERS = 4
+_pdf_executor = None
+
+def get_pdf_executor() -> ThreadPoolExecutor:
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ThreadPoolExecutor(max_workers=PDF_EXPORT_WORKERS, thread_name_prefix="pdf-export")
+    return _pdf_executor
+
+class ExportRequest(BaseModel):
+    user_id: int
+    application_ids: Optional[List[int]] = None  # None = all of the user's applications
+
+class _ZipStream:
+    """
+    Write-only, non-seekable sink for zipfile. zipfile falls back to data
+    descriptors, and written bytes are handed out (and released) via drain().
+    """
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _export_filename(company_name: str, role: str, application_id: int) -> str:
+    stem = re.sub(r"[^A-Za-z0-9]+", "_", f"{company_name}_{role}").strip("_") or "Application"
+    return f"{stem}_{application_id}.pdf"
+
+def render_export_job(application_id: int, filename: str):
+    """Merges and renders one application's PDF on a worker thread with its own DB session."""
+    db = SessionLocal()
+    try:
+        application = db.query(Application).filter(Application.id == application_id).first()
+        user = db.query(User).filter(User.id == application.user_id).first()
+        resume_diff_json = load_analysis_results(db, application_id, steps=["enhanced_resume"]).get("enhanced_resume")
+        if not user.resume_data or not resume_diff_json:
+            raise RuntimeError("Resume data or analysis missing. Please run analysis first.")
+        original_resume_json = user.resume_data
+    finally:
+        db.close()
+
+    final_resume_json = merge_resume(original_resume_json, resume_diff_json)
+    return filename, render_resume(final_resume_json)
+
+@app.post("/api/export_pdfs")
+async def export_pdfs(request: ExportRequest, db: Session = Depends(get_db)):
+    query = db.query(Application.id, Application.company_name, Application.role).filter(Application.user_id == request.user_id)
+    if request.application_ids is not None:
+        query = query.filter(Application.id.in_(request.application_ids))
+    jobs = [(row.id, _export_filename(row.company_name, row.role, row.id)) for row in query.order_by(desc(Application.created_at)).all()]
+    if not jobs:
+        raise HTTPException(status_code=404, detail="No applications found to export")
+
+    # Every merge is a model call and takes its own background slot. The first one is
+    # admitted (or rejected with 429) before streaming starts; later ones wait their turn
+    scheduler_key = f"user:{request.user_id}"
+    admission = AsyncExitStack()
+    await admission.enter_async_context(llm_scheduler.slot(scheduler_key, "background"))
+
+    async def export_job(job, admitted: Optional[AsyncExitStack] = None):
+        async with admitted or llm_scheduler.slot(scheduler_key, "background", wait=True):
+            future = asyncio.get_running_loop().run_in_executor(get_pdf_executor(), render_export_job, *job)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The merge keeps running on its thread; keep the slot until it's done
+                await asyncio.wait([future])
+                raise
+
+    async def stream_zip():
+        in_flight = {}
+        try:
+            pending_jobs = iter(jobs)
+            errors = []
+            sink = _ZipStream()
+
+            def submit_next(admitted=None):
+                job = next(pending_jobs, None)
+                if job:
+                    in_flight[asyncio.ensure_future(export_job(job, admitted))] = job
+
+            # At most PDF_EXPORT_WORKERS PDFs are rendered or held in memory at a time
+            submit_next(admission)
+            for _ in range(PDF_EXPORT_WORKERS - 1):
+                submit_next()
+
+            # PDFs are already Flate-compressed; storing them keeps the event loop free of zlib work
+            with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        application_id, filename = in_flight.pop(future)
+                        try:
+                            _, pdf_bytes = future.result()
+                            archive.writestr(filename, pdf_bytes)
+                        except Exception as e:
+                            print(f"Export Error ({application_id}): {e}")
+                            errors.append(f"{filename}: {e}")
+                        submit_next()
+                        yield sink.drain()
+                if errors:
+                    archive.writestr("errors.txt", "\n".join(errors))
+            # Central directory is written on close
+            yield sink.drain()
+        finally:
+            # Client went away mid-export: stop queued merges, wait for running ones to give back their slots
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            await admission.aclose()
+
+    return StreamingResponse(
+        stream_zip(),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=Optimized_Resumes.zip"},
+        # In case the stream is never iterated (client gone before the first chunk)
+        background=BackgroundTask(admission.aclose)
+    )
@@ -0,0 +1,13 @@
+"""
+Applies database migrations. Run once per deploy, before starting the API
+workers (they refuse to start against an outdated schema):
+
+    python migrate.py
+"""
+from main import DB_SCHEMA_VERSION, run_migrations
+
+if __name__ == "__main__":
+    if run_migrations():
+        print(f"Database migrated to schema version {DB_SCHEMA_VERSION}.")
+    else:
+        print(f"Database already at schema version {DB_SCHEMA_VERSION}.")
@@ -1,11 +1,19 @@
 from google.adk.agents.llm_agent import Agent
 from google.adk.agents.sequential_agent import SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
 import sqlite3
-import json
 import os
+import analysis_store
 
 # --- 0. Shared Tool for Saving Results ---
-def save_analysis_step(application_id: int, step_name: str, result_data: str):
+def _connect():
+    # The agent.py is in backend/optimiser_agent/, db is in backend/hiredly.db
+    current_script_dir = os.path.dirname(os.path.abspath(__file__))
+    return sqlite3.connect(os.path.join(current_script_dir, '..', 'hiredly.db'))
+
+def save_analysis_step(application_id: int, step_name: str, result_data: str, tool_context: ToolContext):
     """
     Saves the JSON result of an analysis step to the database.
     Args:
@@ -13,25 +21,16 @@ def save_analysis_step(application_id: int, step_name: str, result_data: str):
         step_name (str): One of 'ats_score', 'skill_gap', 'resources', 'enhanced_resume'.
         result_data (str): The JSON data as a serialized STRING.
     """
-    column_map = {
-        'ats_score': 'ats_score_data',
-        'skill_gap': 'skill_gap_data',
-        'resources': 'resource_data',
-        'enhanced_resume': 'enhanced_resume_data'
-    }
-    
-    if step_name not in column_map:
+    if step_name not in analysis_store.STEP_COLUMNS:
         return f"ERROR: Invalid step_name '{step_name}'."
         
     try:
         # Parse the input string to ensure it's valid JSON before saving
         # Though we save it as a string in DB anyway, this acts as validation
-        parsed_data = json.loads(result_data)
+        # (strict: the backend serves the stored string as-is, so no NaN/Infinity)
+        parsed_data = analysis_store.loads_strict(result_data)
         
-        current_script_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_script_dir, '..', 'hiredly.db')
-        
-        conn = sqlite3.connect(db_path)
+        conn = _connect()
         cursor = conn.cursor()
         
         cursor.execute("SELECT id FROM applications WHERE id = ?", (application_id,))
@@ -39,21 +38,53 @@ def save_analysis_step(application_id: int, step_name: str, result_data: str):
              conn.close()
              return f"ERROR: Application ID {application_id} not found."
              
-        target_column = column_map[step_name]
-        query = f"UPDATE applications SET {target_column} = ? WHERE id = ?"
-        
-        # We save the raw string (which we confirmed is valid JSON)
-        cursor.execute(query, (result_data, application_id))
+        # Record what this result was computed from, so unchanged steps can be skipped next time
+        state = tool_context.state
+        state[f"result_{step_name}"] = result_data
+        results = {step: state.get(f"result_{step}") for step in analysis_store.STEP_COLUMNS}
+        input_hash = analysis_store.step_input_hash(step_name, state.get("base_input_hash"), results)
+        state[f"input_hash_{step_name}"] = input_hash
+
+        # We save the raw string (which we confirmed is valid JSON), compressed in the side table
+        analysis_store.upsert_result(cursor, application_id, step_name, result_data, input_hash)
         conn.commit()
         conn.close()
         
         return f"SUCCESS: Saved {step_name} result for Application {application_id}."
         
-    except json.JSONDecodeError as e:
+    except ValueError as e:
+        # JSONDecodeError is a ValueError; so is a rejected NaN/Infinity
         return f"ERROR: Invalid JSON string provided: {str(e)}"
     except Exception as e:
         return f"ERROR: Database write failed: {str(e)}"
 
+# --- Step Caching ---
+# The backend seeds the session state with the stored result and input hash of
+# every step. A step whose inputs hash the same is skipped and replays its
+# cached result into the conversation, so downstream agents still see it.
+
+def skip_if_unchanged(step_name: str):
+    def callback(callback_context: CallbackContext):
+        state = callback_context.state
+        cached = state.get(f"result_{step_name}")
+        results = {step: state.get(f"result_{step}") for step in analysis_store.STEP_COLUMNS}
+        current_hash = analysis_store.step_input_hash(step_name, state.get("base_input_hash"), results)
+        if cached and current_hash and current_hash == state.get(f"input_hash_{step_name}"):
+            state[f"skipped_{step_name}"] = True
+            return types.Content(role="model", parts=[types.Part(text=cached)])
+        # Rerunning: drop the stale result so downstream steps can't match against it
+        state[f"skipped_{step_name}"] = False
+        state[f"result_{step_name}"] = None
+        return None
+    return callback
+
+def skip_saver_if_unchanged(step_name: str):
+    def callback(callback_context: CallbackContext):
+        if callback_context.state.get(f"skipped_{step_name}"):
+            return types.Content(role="model", parts=[types.Part(text=f"{step_name} unchanged, cached result kept.")])
+        return None
+    return callback
+
 # --- 1. Analysis Agents (Pure Logic, No Tools) ---
 
 ats_agent = Agent(
@@ -83,7 +114,8 @@ ats_agent = Agent(
         "formatting_issues": ["..."]
     }
     """,
-    output_key='ats_result'
+    output_key='ats_result',
+    before_agent_callback=skip_if_unchanged('ats_score')
 )
 
 skill_gap_agent = Agent(
@@ -105,7 +137,8 @@ skill_gap_agent = Agent(
         "missing_soft_skills": [{"skill": "...", "priority": "Low"}]
     }
     """,
-    output_key='skill_gap_result'
+    output_key='skill_gap_result',
+    before_agent_callback=skip_if_unchanged('skill_gap')
 )
 
 resource_agent = Agent(
@@ -130,7 +163,8 @@ resource_agent = Agent(
         "recommended_videos": [{"title": "...", "channel": "...", "views": "...", "skill": "..."}]
     }
     """,
-    output_key='resource_result'
+    output_key='resource_result',
+    before_agent_callback=skip_if_unchanged('resources')
 )
 
 resume_enhancer_agent = Agent(
@@ -157,10 +191,11 @@ resume_enhancer_agent = Agent(
     If a section requires no changes to align with the JD, omit it from the diff.
     """,
     tools=[save_analysis_step],
-    output_key='enhanced_resume_result'
+    output_key='enhanced_resume_result',
+    before_agent_callback=skip_if_unchanged('enhanced_resume')
 )
 
-def create_db_saver_agent(suffix: str):
+def create_db_saver_agent(suffix: str, step_name: str):
     return Agent(
         model='gemini-2.0-flash',
         name=f'DB_Saver_{suffix}',
@@ -186,7 +221,8 @@ def create_db_saver_agent(suffix: str):
            - Take the exact output from the previous agent and serialize it to a JSON string if needed, or pass it as a raw string if it's already text.
            - Do NOT truncate or summarize the data.
         """,
-        tools=[save_analysis_step]
+        tools=[save_analysis_step],
+        before_agent_callback=skip_saver_if_unchanged(step_name)
     )
 
 # --- 3. Sequential Orchestrator ---
@@ -194,9 +230,9 @@ root_agent = SequentialAgent(
     name='application_optimiser',
     description='Sequential workflow with interleaved DB saving.',
     sub_agents=[
-        ats_agent, create_db_saver_agent('ATS'),
-        skill_gap_agent, create_db_saver_agent('SkillGap'),
-        resource_agent, create_db_saver_agent('Resource'),
-        resume_enhancer_agent, create_db_saver_agent('Resume')
+        ats_agent, create_db_saver_agent('ATS', 'ats_score'),
+        skill_gap_agent, create_db_saver_agent('SkillGap', 'skill_gap'),
+        resource_agent, create_db_saver_agent('Resource', 'resources'),
+        resume_enhancer_agent, create_db_saver_agent('Resume', 'enhanced_resume')
     ]
 )
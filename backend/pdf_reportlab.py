@@ -0,0 +1,203 @@
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import HRFlowable, KeepTogether, ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Native ReportLab layout of the resume schema. Mirrors templates/resume_template.html
+# (same sections, order and typography; CSS px converted to pt at 0.75) without the
+# HTML/CSS parsing cost of xhtml2pdf.
+
+PAGE_MARGIN = 15  # 20px
+
+SKILL_LABELS = [
+    ('languages', 'Languages'),
+    ('web_technologies', 'Web Technologies'),
+    ('databases', 'Database'),
+    ('tools_and_software', 'Software'),
+    ('ai_ml', 'AI & ML'),
+    ('cloud', 'Cloud'),
+    ('soft_skills', 'Soft Skills')
+]
+
+
+@lru_cache(maxsize=1)
+def _styles() -> dict:
+    """Paragraph/table styles, built once per process."""
+    text = colors.HexColor('#333333')
+    muted = colors.HexColor('#555555')
+    body = ParagraphStyle('Body', fontName='Helvetica', fontSize=9, leading=13.5, textColor=text)
+    return {
+        'name': ParagraphStyle('Name', parent=body, fontName='Helvetica-Bold', fontSize=18, leading=22,
+                               alignment=TA_CENTER, textColor=colors.HexColor('#222222')),
+        'contact': ParagraphStyle('Contact', parent=body, fontSize=8.25, alignment=TA_CENTER, textColor=muted),
+        'section': ParagraphStyle('Section', parent=body, fontName='Helvetica-Bold', fontSize=12, leading=15,
+                                  textColor=colors.HexColor('#222222'), spaceBefore=11),
+        'header_left': ParagraphStyle('HeaderLeft', parent=body, fontName='Helvetica-Bold', fontSize=10.5),
+        'header_right': ParagraphStyle('HeaderRight', parent=body, fontName='Helvetica-Bold', alignment=TA_RIGHT),
+        'sub_left': ParagraphStyle('SubLeft', parent=body, fontName='Helvetica-Oblique', textColor=muted),
+        'sub_right': ParagraphStyle('SubRight', parent=body, fontName='Helvetica-Oblique', textColor=muted,
+                                    alignment=TA_RIGHT),
+        'tech_stack': ParagraphStyle('TechStack', parent=body, fontName='Helvetica-Oblique', fontSize=8.25,
+                                     textColor=colors.HexColor('#666666'), spaceAfter=2),
+        'bullet': body,
+        'row': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+        ]),
+        'rule': colors.HexColor('#333333'),
+    }
+
+
+def _text(value) -> str:
+    return escape(str(value)) if value not in (None, '') else ''
+
+
+def _attr(value) -> str:
+    # Attribute values are double-quoted in the markup
+    return escape(str(value), {'"': '&quot;'}) if value not in (None, '') else ''
+
+
+def _row(left: str, right: str, left_style: str, right_style: str, width: float) -> Table:
+    styles = _styles()
+    table = Table(
+        [[Paragraph(left, styles[left_style]), Paragraph(right, styles[right_style])]],
+        colWidths=[width * 0.7, width * 0.3]
+    )
+    table.setStyle(styles['row'])
+    return table
+
+
+def _bullets(items) -> ListFlowable:
+    style = _styles()['bullet']
+    return ListFlowable(
+        [ListItem(Paragraph(item, style), leftIndent=11) for item in items],
+        bulletType='bullet', start='•', leftIndent=11, bulletFontSize=7, spaceAfter=7
+    )
+
+
+def _section(title: str, width: float) -> list:
+    styles = _styles()
+    return [
+        Paragraph(_text(title.upper()), styles['section']),
+        HRFlowable(width=width, thickness=1.5, color=styles['rule'], spaceBefore=1, spaceAfter=7)
+    ]
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    return [value] if isinstance(value, (str, dict)) else list(value)
+
+
+def build_story(resume: dict, width: float) -> list:
+    """Flowables for a resume dict in the shape produced by the onboarding/merge steps."""
+    styles = _styles()
+    info = resume.get('personal_info') or {}
+    story = [Paragraph(_text(str(info.get('name', '')).upper()), styles['name'])]
+
+    email, linkedin = info.get('email'), info.get('linkedin')
+    contact = [
+        _text(info.get('location')),
+        _text(info.get('phone')),
+        f'<a href="mailto:{_attr(email)}" color="#0056b3">{_text(email)}</a>' if email else '',
+        f'<a href="{_attr(linkedin)}" color="#0056b3">{_text(linkedin)}</a>' if linkedin else ''
+    ]
+    story += [Spacer(1, 4), Paragraph(' | '.join(contact), styles['contact'])]
+
+    education = _as_list(resume.get('education'))
+    if education:
+        story += _section('Education', width)
+        for edu in education:
+            if not isinstance(edu, dict):
+                story.append(_row(_text(edu), '', 'header_left', 'header_right', width))
+                continue
+            degree = _text(edu.get('degree'))
+            if edu.get('cgpa'):
+                degree += f"; CGPA: {_text(edu.get('cgpa'))}"
+            story.append(KeepTogether([
+                _row(_text(edu.get('institution')), _text(edu.get('location')), 'header_left', 'header_right', width),
+                _row(degree, _text(edu.get('period')), 'sub_left', 'sub_right', width)
+            ]))
+
+    experience = _as_list(resume.get('experience'))
+    if experience:
+        story += _section('Experience', width)
+        for exp in experience:
+            if not isinstance(exp, dict):
+                story.append(_row(_text(exp), '', 'header_left', 'header_right', width))
+                continue
+            entry = [
+                _row(_text(exp.get('company')), _text(exp.get('location')), 'header_left', 'header_right', width),
+                _row(_text(exp.get('role')), _text(exp.get('period')), 'sub_left', 'sub_right', width)
+            ]
+            responsibilities = [_text(r) for r in _as_list(exp.get('responsibilities'))]
+            if responsibilities:
+                entry.append(_bullets(responsibilities))
+            story.append(KeepTogether(entry))
+
+    projects = _as_list(resume.get('projects'))
+    if projects:
+        story += _section('Projects', width)
+        for proj in projects:
+            if not isinstance(proj, dict):
+                story.append(_row(_text(proj), '', 'header_left', 'header_right', width))
+                continue
+            entry = [_row(_text(proj.get('name')), '', 'header_left', 'header_right', width)]
+            tech_stack = proj.get('tech_stack')
+            if tech_stack:
+                if not isinstance(tech_stack, str):
+                    tech_stack = ', '.join(str(t) for t in tech_stack)
+                entry.append(Paragraph(f"Tech Stack: {_text(tech_stack)}", styles['tech_stack']))
+            lines = [_text(d) for d in _as_list(proj.get('description'))] or ['']
+            if proj.get('achievement'):
+                lines.append(_text(proj.get('achievement')))
+            entry.append(_bullets(lines))
+            story.append(KeepTogether(entry))
+
+    skills = resume.get('skills') or {}
+    story += _section('Technical Skills', width)
+    skill_lines = [
+        f"<b>{_text(label)}:</b> {_text(', '.join(str(s) for s in _as_list(skills.get(key))))}"
+        for key, label in SKILL_LABELS if skills.get(key)
+    ]
+    if skill_lines:
+        story.append(_bullets(skill_lines))
+
+    certifications = _as_list(resume.get('certifications'))
+    if certifications:
+        story += _section('Courses & Certifications', width)
+        lines = []
+        for cert in certifications:
+            if isinstance(cert, dict):
+                issuer = f" - {_text(cert.get('issuer'))}" if cert.get('issuer') else ''
+                lines.append(f"{_text(cert.get('name'))}{issuer}")
+            else:
+                lines.append(_text(cert))
+        story.append(_bullets(lines))
+
+    achievements = _as_list(resume.get('achievements'))
+    if achievements:
+        story += _section('Achievements & Co-Curricular', width)
+        story.append(_bullets([_text(a) for a in achievements]))
+
+    return story
+
+
+def render_resume_pdf(resume: dict) -> bytes:
+    """Renders the resume straight to PDF bytes."""
+    buffer = BytesIO()
+    name = (resume.get('personal_info') or {}).get('name', '')
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, title=f"{name} - Resume",
+        leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN, topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN
+    )
+    doc.build(build_story(resume, doc.width))
+    return buffer.getvalue()
@@ -2,10 +2,77 @@ import json
 import os
 import re
 from google.adk.agents.llm_agent import Agent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
 
 # --- 1. Define the Tool ---
 import sqlite3
 
+def _connect():
+    # The agent.py is in backend/resume_agent/, db is in backend/hiredly.db
+    current_script_dir = os.path.dirname(os.path.abspath(__file__))
+    db_path = os.path.join(current_script_dir, '..', 'hiredly.db')
+    return sqlite3.connect(db_path)
+
+# Object sections are merged field by field; list sections are replaced as a whole
+OBJECT_SECTIONS = ("personal_info", "skills")
+LIST_SECTIONS = ("education", "experience", "projects", "certifications", "achievements")
+INTERVIEW_ORDER = ("personal_info", "education", "experience", "projects", "skills", "certifications", "achievements")
+
+def _reject_constant(name):
+    # The backend serves resume_data as-is, so it must be strict JSON (no NaN/Infinity)
+    raise ValueError(f"{name} is not valid JSON")
+
+def save_resume_section_tool(email: str, section: str, section_json: str, tool_context: ToolContext):
+    """
+    Saves ONE completed resume section for the user, leaving the other sections untouched.
+    Args:
+        email (str): The user's email address (from Personal Info).
+        section (str): One of 'personal_info', 'education', 'experience', 'projects',
+            'skills', 'certifications', 'achievements'.
+        section_json (str): The section value as a serialized JSON STRING
+            (an object for personal_info/skills, a list for the others).
+    """
+    if section not in INTERVIEW_ORDER:
+        return f"ERROR: Invalid section '{section}'."
+    try:
+        value = json.loads(section_json, parse_constant=_reject_constant)
+    except ValueError as e:
+        return f"ERROR: Invalid JSON string provided: {str(e)}"
+    expected_type = dict if section in OBJECT_SECTIONS else list
+    if not isinstance(value, expected_type):
+        return f"ERROR: '{section}' must be a JSON {'object' if expected_type is dict else 'list'}."
+
+    # Patch the stored document in place with SQLite JSON1 instead of rewriting it
+    current = "CASE WHEN json_valid(resume_data) THEN resume_data ELSE '{}' END"
+    if section in OBJECT_SECTIONS:
+        update = f"json_set({current}, '$.{section}', json_patch(COALESCE(json_extract({current}, '$.{section}'), '{{}}'), json(?)))"
+    else:
+        update = f"json_set({current}, '$.{section}', json(?))"
+
+    try:
+        conn = _connect()
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE users SET resume_data = {update} WHERE email = ?", (json.dumps(value), email))
+        if cursor.rowcount == 0:
+            conn.close()
+            return f"ERROR: User with email {email} not found. Please sign up on the website first."
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        return f"ERROR: Could not save to database. Reason: {str(e)}"
+
+    # Keep the structured "collected so far" resume in session state (see compact_history)
+    collected = dict(tool_context.state.get("collected_resume") or {})
+    if section in OBJECT_SECTIONS:
+        collected[section] = {**(collected.get(section) or {}), **value}
+    else:
+        collected[section] = value
+    tool_context.state["collected_resume"] = collected
+    return f"SUCCESS: Saved section '{section}'."
+
 def save_user_details_tool(json_data: dict):
     """
     Saves the finalized resume data to the SQLite database.
@@ -18,11 +85,7 @@ def save_user_details_tool(json_data: dict):
             return "ERROR: Could not save. Email address is missing in the data."
         
         # 2. Connect to Database
-        # The agent.py is in backend/resume_agent/, db is in backend/hiredly.db
-        current_script_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(current_script_dir, '..', 'hiredly.db')
-        
-        conn = sqlite3.connect(db_path)
+        conn = _connect()
         cursor = conn.cursor()
         
         # 3. Check if user exists
@@ -34,7 +97,7 @@ def save_user_details_tool(json_data: dict):
              return f"ERROR: User with email {user_email} not found. Please sign up on the website first."
         
         # 4. Update resume_data
-        cursor.execute("UPDATE users SET resume_data = ? WHERE email = ?", (json.dumps(json_data), user_email))
+        cursor.execute("UPDATE users SET resume_data = ? WHERE email = ?", (json.dumps(json_data, allow_nan=False), user_email))
         conn.commit()
         conn.close()
             
@@ -73,16 +136,22 @@ Your goal is to gather specific career details from the user to construct a JSON
     * **If User says YES:** Collect details for the new entry.
     * **If User says NO:** Move immediately to the next section in the list.
 
-4.  **Final Output:** * Once ALL sections are complete, compile the data into the **Target JSON Schema**.
-    * **IMMEDIATELY** call the tool `save_user_details_tool` with this JSON data.
+4.  **Save Each Section As You Go:**
+    * As soon as a section is complete (for loop sections: when the user chooses to move on), call `save_resume_section_tool`
+      with the user's email, the section key, and ONLY that section's value serialized as a JSON string.
+        * e.g. `section='experience'`, `section_json='[{"company": "...", "role": "...", ...}]'` (all entries of that section).
+    * Save `personal_info` first; the email identifies the user for every later save.
+    * Do not mention the save to the user unless it fails.
+
+5.  **Final Output:** * Once ALL sections are complete and saved, do NOT re-send the whole resume. Every section is already stored.
+    * Only if a section save failed earlier, call `save_user_details_tool` with the full data compiled into the **Target JSON Schema**.
     * Do NOT show the raw JSON to the user. Just confirm it has been saved.
     * **CRITICAL:** Append the tag `[ONBOARDING_COMPLETE]` to the very end of your final confirmation message. This triggers the next step in the UI.
 
-5.  **Partial Save / Early Exit:**
+6.  **Partial Save / Early Exit:**
     * If the user or system indicates a desire to "Proceed", "Stop", or "Save Partial Data":
-        * Immediately compile whatever data you have gathered so far.
-        * Fill any missing mandatory fields in the schema with empty strings `""` or empty lists `[]`.
-        * **Call the tool `save_user_details_tool`** with this partial data.
+        * Completed sections are already saved. Call `save_resume_section_tool` only for the section in progress, with whatever you have for it.
+        * Fill any missing mandatory fields in that section with empty strings `""` or empty lists `[]`.
         * Respond with a confirmation message "Partial data saved."
 
 ### TARGET JSON SCHEMA:
@@ -106,11 +175,59 @@ Your goal is to gather specific career details from the user to construct a JSON
 }
 """
 
-# --- 3. Initialize the Agent ---
+# --- 3. History Compaction ---
+# Turns belonging to sections that were already saved are replaced by a compact
+# summary of the collected data, so each model call only re-reads the latest user
+# message and the section in progress, and the prompt stays roughly the same size
+# throughout the interview.
+
+def _is_successful_section_save(content: types.Content) -> bool:
+    for part in content.parts or []:
+        response = part.function_response
+        if response and response.name == "save_resume_section_tool":
+            if str((response.response or {}).get("result", "")).startswith("SUCCESS"):
+                return True
+    return False
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+def compact_history(callback_context: CallbackContext, llm_request: LlmRequest):
+    collected = callback_context.state.get("collected_resume")
+    if not collected:
+        return None
+
+    last_save = None
+    for index, content in enumerate(llm_request.contents):
+        if _is_successful_section_save(content):
+            last_save = index
+    if last_save is None:
+        return None
+    # Keep the user turn that led to the save: it may already cover the next section
+    # ("that's all - my first project is X")
+    cut = last_save + 1
+    for index in range(last_save, -1, -1):
+        if _is_user_message(llm_request.contents[index]):
+            cut = index
+            break
+
+    remaining = [section for section in INTERVIEW_ORDER if section not in collected]
+    summary = types.Content(role="user", parts=[types.Part(text=(
+        "[INTERVIEW PROGRESS - earlier conversation omitted]\n"
+        f"Sections completed and saved: {', '.join(collected)}.\n"
+        f"Sections remaining: {', '.join(remaining) or 'none'}.\n"
+        f"Collected so far: {json.dumps(collected, separators=(',', ':'))}\n"
+        "Continue the interview from where the conversation below leaves off."
+    ))])
+    llm_request.contents = [summary] + llm_request.contents[cut:]
+    return None
+
+# --- 4. Initialize the Agent ---
 root_agent = Agent(
     model='gemini-2.0-flash',
     name='ResumeInterviewer',
     description='A consultant agent that interviews users to build their resume and saves it to a file.',
     instruction=interview_instruction,
-    tools=[save_user_details_tool] 
+    tools=[save_resume_section_tool, save_user_details_tool],
+    before_model_callback=compact_history
 )
\ No newline at end of file
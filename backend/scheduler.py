@@ -0,0 +1,208 @@
+import asyncio
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+
+# Admission control for the endpoints that call the model. Every call takes a
+# slot from a shared pool sized to the model quota:
+#   - each user has a token bucket; heavier classes cost more tokens
+#   - when the pool is full, requests wait in a bounded queue per priority class,
+#     served highest priority first and round-robin across users within a class
+#   - INTERACTIVE_RESERVE slots are kept for chat: standard and background work
+#     together never take more than MAX_CONCURRENT_LLM - INTERACTIVE_RESERVE, so a
+#     chat turn never queues behind long-running analyses
+# A full queue or an empty bucket is rejected with a retry hint (HTTP 429 in main.py).
+
+MAX_CONCURRENT_LLM = 8
+INTERACTIVE_RESERVE = 2
+BUCKET_CAPACITY = 30
+REFILL_PER_SECOND = 0.5
+
+# priority: lower is served first; only 'reserved' classes may use the INTERACTIVE_RESERVE slots
+CLASSES = {
+    'interactive': {'priority': 0, 'cost': 1, 'max_queue': 50, 'max_in_flight': MAX_CONCURRENT_LLM,  # chat turns
+                    'reserved': True},
+    'standard': {'priority': 1, 'cost': 2, 'max_queue': 20, 'max_in_flight': 6},                      # upload, single PDF
+    'background': {'priority': 2, 'cost': 5, 'max_queue': 10, 'max_in_flight': 4}                     # analysis, bulk export
+}
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Scheduler:
+    def __init__(self, max_concurrent=MAX_CONCURRENT_LLM, classes=CLASSES,
+                 bucket_capacity=BUCKET_CAPACITY, refill_per_second=REFILL_PER_SECOND,
+                 interactive_reserve=INTERACTIVE_RESERVE):
+        self.max_concurrent = max_concurrent
+        self.interactive_reserve = interactive_reserve
+        self.classes = classes
+        self.bucket_capacity = bucket_capacity
+        self.refill_per_second = refill_per_second
+        self._order = sorted(classes, key=lambda name: classes[name]['priority'])
+        self._in_flight = Counter()
+        self._waiting = {name: OrderedDict() for name in classes}  # user -> deque of futures
+        self._depth = Counter()
+        self._buckets = OrderedDict()                               # user -> (tokens, last_refill), least recent first
+        self._service_time = {name: 10.0 for name in classes}       # EWMA seconds, for Retry-After
+        self.admitted = Counter()
+        self.rejected = Counter()
+
+    # --- Token buckets ---
+
+    def _take_tokens(self, user: str, cost: int) -> float:
+        """Takes `cost` tokens; returns 0 on success or seconds until enough are available."""
+        now = time.monotonic()
+        self._evict_idle(now)
+        tokens, last = self._buckets.get(user, (self.bucket_capacity, now))
+        tokens = min(self.bucket_capacity, tokens + (now - last) * self.refill_per_second)
+        self._buckets[user] = (tokens, now)
+        self._buckets.move_to_end(user)
+        if tokens < cost:
+            return (cost - tokens) / self.refill_per_second
+        self._buckets[user] = (tokens - cost, now)
+        return 0
+
+    def _refund_tokens(self, user: str, cost: int):
+        """Gives back tokens for a request that was admitted but never ran."""
+        if user in self._buckets:
+            tokens, last = self._buckets[user]
+            self._buckets[user] = (min(self.bucket_capacity, tokens + cost), last)
+
+    def _evict_idle(self, now: float):
+        # A bucket untouched for long enough to refill completely is the same as no bucket
+        idle_after = self.bucket_capacity / self.refill_per_second
+        while self._buckets:
+            user, (_, last) = next(iter(self._buckets.items()))
+            if now - last < idle_after:
+                break
+            del self._buckets[user]
+
+    # --- Slots ---
+
+    def _can_start(self, name: str) -> bool:
+        if sum(self._in_flight.values()) >= self.max_concurrent:
+            return False
+        if self._in_flight[name] >= self.classes[name]['max_in_flight']:
+            return False
+        if self.classes[name].get('reserved'):
+            return True
+        unreserved = sum(n for cls, n in self._in_flight.items() if not self.classes[cls].get('reserved'))
+        return unreserved < self.max_concurrent - self.interactive_reserve
+
+    def _dispatch(self):
+        """Hands free slots to waiters: highest priority first, round-robin over users."""
+        progressed = True
+        while progressed:
+            progressed = False
+            for name in self._order:
+                queue = self._waiting[name]
+                if not queue or not self._can_start(name):
+                    continue
+                user, waiters = next(iter(queue.items()))
+                future = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(user)
+                else:
+                    del queue[user]
+                self._depth[name] -= 1
+                if future.cancelled():
+                    progressed = True
+                    break
+                self._in_flight[name] += 1
+                future.set_result(None)
+                progressed = True
+                break
+
+    def _release(self, name: str):
+        self._in_flight[name] -= 1
+        self._dispatch()
+
+    def _discard_waiter(self, name: str, user: str, future):
+        waiters = self._waiting[name].get(user)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            self._depth[name] -= 1
+            if not waiters:
+                del self._waiting[name][user]
+
+    async def _acquire(self, user: str, name: str):
+        config = self.classes[name]
+        queued = not (self._can_start(name) and not self._depth[name])
+        # Check the queue before charging tokens, so a busy server doesn't drain buckets
+        if queued and self._depth[name] >= config['max_queue']:
+            self.rejected[name] += 1
+            ahead = self._depth[name] + self._in_flight[name]
+            raise Rejected("Server busy", self._service_time[name] * ahead / config['max_in_flight'])
+        wait = self._take_tokens(user, config['cost'])
+        if wait:
+            self.rejected[name] += 1
+            raise Rejected("Rate limit exceeded", wait)
+
+        if not queued:
+            self._in_flight[name] += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[name].setdefault(user, deque()).append(future)
+        self._depth[name] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as the client went away
+                self._release(name)
+            else:
+                self._discard_waiter(name, user, future)
+            self._refund_tokens(user, config['cost'])
+            raise
+
+    @asynccontextmanager
+    async def slot(self, user: str, name: str, wait: bool = False):
+        """
+        Holds one model-call slot for `user` in class `name` for the duration of the block.
+        With `wait`, a rejection is retried after its retry hint instead of raised
+        (for work that is already streaming, like bulk export).
+        """
+        while True:
+            try:
+                await self._acquire(user, name)
+                break
+            except Rejected as e:
+                if not wait:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+        self.admitted[name] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_time[name] = 0.8 * self._service_time[name] + 0.2 * elapsed
+            self._release(name)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": sum(self._in_flight.values()),
+            "max_concurrent": self.max_concurrent,
+            "interactive_reserve": self.interactive_reserve,
+            "tracked_buckets": len(self._buckets),
+            "classes": {
+                name: {
+                    "priority": self.classes[name]['priority'],
+                    "in_flight": self._in_flight[name],
+                    "queue_depth": self._depth[name],
+                    "max_queue": self.classes[name]['max_queue'],
+                    "waiting_users": len(self._waiting[name]),
+                    "admitted": self.admitted[name],
+                    "rejected": self.rejected[name],
+                    "avg_service_seconds": round(self._service_time[name], 2)
+                }
+                for name in self._order
+            }
+        }
@@ -0,0 +1,158 @@
+import re
+
+# SQLite FTS5 index over applications: company, role, job description text and
+# the ATS step's missing keywords. rowid = applications.id.
+#
+# External-content table: the index stores only tokens and reads column text
+# (for snippet()) from the `applications_search_content` view, so JD text stays
+# stored once per JD in `job_descriptions`. Triggers keep the index in sync with
+# `applications` and the plain `keywords` column of `analysis_results`. FTS5's
+# 'delete' command must be given the exact values that were indexed, so every
+# trigger is an AFTER trigger that deletes with the OLD values and re-adds the
+# row from the view. (An UPSERT fires BEFORE INSERT triggers even when it ends up
+# updating, so BEFORE triggers would delete twice.)
+
+# bm25 column weights: company_name, role, job_description, missing_keywords
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0, 3.0)
+
+COLUMNS = "company_name, role, job_description, missing_keywords"
+
+
+def _index_row(application_id: str) -> str:
+    return f"""
+    INSERT INTO applications_fts (rowid, {COLUMNS})
+    SELECT id, {COLUMNS} FROM applications_search_content WHERE id = {application_id};"""
+
+
+def _unindex_row(application_id: str, company_name: str, role: str, job_description_id: str, keywords: str) -> str:
+    return f"""
+    INSERT INTO applications_fts (applications_fts, rowid, {COLUMNS})
+    VALUES (
+        'delete', {application_id}, {company_name}, {role},
+        (SELECT text FROM job_descriptions WHERE id = {job_description_id}),
+        {keywords}
+    );"""
+
+
+def _stored_keywords(application_id: str) -> str:
+    return f"(SELECT keywords FROM analysis_results WHERE application_id = {application_id} AND step = 'ats_score')"
+
+
+def _application_columns(application_id: str) -> tuple:
+    return (
+        f"(SELECT company_name FROM applications WHERE id = {application_id})",
+        f"(SELECT role FROM applications WHERE id = {application_id})",
+        f"(SELECT job_description_id FROM applications WHERE id = {application_id})"
+    )
+
+
+SCHEMA = f"""
+CREATE VIEW IF NOT EXISTS applications_search_content AS
+SELECT a.id AS id, a.company_name AS company_name, a.role AS role,
+       jd.text AS job_description, r.keywords AS missing_keywords
+FROM applications a
+LEFT JOIN job_descriptions jd ON jd.id = a.job_description_id
+LEFT JOIN analysis_results r ON r.application_id = a.id AND r.step = 'ats_score';
+
+CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+    {COLUMNS},
+    content = 'applications_search_content', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+    {_index_row("NEW.id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_update
+AFTER UPDATE OF company_name, role, job_description_id ON applications BEGIN
+    {_unindex_row("OLD.id", "OLD.company_name", "OLD.role", "OLD.job_description_id", _stored_keywords("OLD.id"))}
+    {_index_row("NEW.id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications BEGIN
+    {_unindex_row("OLD.id", "OLD.company_name", "OLD.role", "OLD.job_description_id", _stored_keywords("OLD.id"))}
+END;
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_keywords_insert
+AFTER INSERT ON analysis_results WHEN NEW.step = 'ats_score' BEGIN
+    {_unindex_row("NEW.application_id", *_application_columns("NEW.application_id"), "NULL")}
+    {_index_row("NEW.application_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_keywords_update
+AFTER UPDATE OF keywords ON analysis_results WHEN NEW.step = 'ats_score' BEGIN
+    {_unindex_row("OLD.application_id", *_application_columns("OLD.application_id"), "OLD.keywords")}
+    {_index_row("NEW.application_id")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS applications_fts_keywords_delete
+AFTER DELETE ON analysis_results WHEN OLD.step = 'ats_score' BEGIN
+    {_unindex_row("OLD.application_id", *_application_columns("OLD.application_id"), "OLD.keywords")}
+    {_index_row("OLD.application_id")}
+END;
+"""
+
+TRIGGERS = (
+    "applications_fts_insert", "applications_fts_update", "applications_fts_delete",
+    "applications_fts_keywords_insert", "applications_fts_keywords_update", "applications_fts_keywords_delete"
+)
+
+REBUILD_SQL = "INSERT INTO applications_fts (applications_fts) VALUES ('rebuild')"
+
+
+def create_search_index(conn):
+    """
+    Creates the FTS table, its content view and triggers, building the index on
+    first creation. An index from before the external-content layout (which kept
+    its own copy of every JD) is dropped and rebuilt.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'applications_fts'")
+    row = cursor.fetchone()
+    if row and "content_rowid" not in row[0]:
+        for trigger in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE applications_fts")
+        row = None
+    cursor.executescript(SCHEMA)
+    if row is None:
+        cursor.execute(REBUILD_SQL)
+    conn.commit()
+
+
+def build_match_query(text: str):
+    """
+    Turns free text into an FTS5 query: every word must match, each as a prefix
+    ("pyth dev" finds "Python Developer"). Returns None when there are no words.
+    FTS5 operators in the input are not interpreted.
+    """
+    words = re.findall(r"\w+", text or "", flags=re.UNICODE)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_sql(with_status: bool) -> str:
+    weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+    status_filter = "AND a.status = :status" if with_status else ""
+    return f"""
+        SELECT a.id, a.user_id, a.company_name, a.role, a.status, a.created_at,
+               bm25(applications_fts, {weights}) AS rank,
+               snippet(applications_fts, 2, '[', ']', '...', 12) AS snippet
+        FROM applications_fts
+        JOIN applications a ON a.id = applications_fts.rowid
+        WHERE applications_fts MATCH :query AND a.user_id = :user_id {status_filter}
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def count_sql(with_status: bool) -> str:
+    status_filter = "AND a.status = :status" if with_status else ""
+    return f"""
+        SELECT COUNT(*)
+        FROM applications_fts
+        JOIN applications a ON a.id = applications_fts.rowid
+        WHERE applications_fts MATCH :query AND a.user_id = :user_id {status_filter}
+    """
@@ -0,0 +1,43 @@
+import asyncio
+from collections import Counter
+
+# Coalesces concurrent identical work: while a computation for a key is running,
+# later callers with the same key await that same computation instead of starting
+# their own (double-clicks, frontend retries).
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.started = Counter()
+        self.shared = Counter()
+
+    async def do(self, key: tuple, fn):
+        """
+        Runs `fn()` (a coroutine function) once per in-flight `key` and returns its
+        result (or raises its exception) to every caller. The computation is shielded,
+        so a caller disconnecting does not cancel it for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started[key[0]] += 1
+        else:
+            self.shared[key[0]] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: tuple, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so an abandoned failed task isn't logged as "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "started": dict(self.started),
+            "shared": dict(self.shared)
+        }
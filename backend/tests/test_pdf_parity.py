@@ -0,0 +1,73 @@
+import re
+from io import BytesIO
+
+import pytest
+from pypdf import PdfReader
+
+import main
+
+RESUME = {
+    "personal_info": {
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "phone": "555-0100",
+        "location": "Remote",
+        "linkedin": "linkedin.com/in/janedoe"
+    },
+    "education": [
+        {"institution": "State University", "degree": "Bachelor of Engineering", "cgpa": "9.1",
+         "location": "Pune", "period": "2016 - 2020"}
+    ],
+    "experience": [
+        {"company": "Acme Corp", "role": "Backend Engineer", "location": "Remote", "period": "2021 - Present",
+         "responsibilities": ["Built data pipelines with Airflow & Spark", "Cut p95 latency by 40%"]},
+        {"company": "Initech", "role": "Intern", "location": "Pune", "period": "2020", "responsibilities": []}
+    ],
+    "projects": [
+        {"name": "Hiredly", "tech_stack": ["FastAPI", "React.js"], "description": ["Resume optimiser", "ATS scoring"],
+         "achievement": "Top 10 at hackathon"},
+        {"name": "Notes", "tech_stack": "Go, SQLite", "description": "CLI note taker"}
+    ],
+    "skills": {"languages": ["Python", "Go"], "cloud": ["Google Cloud Platform"], "soft_skills": ["Mentoring"]},
+    "certifications": [{"name": "AWS Solutions Architect", "issuer": "Amazon"}, "Kubernetes Fundamentals"],
+    "achievements": ["Dean's list <2019>"]
+}
+
+# Loosely shaped merge output the template already tolerates
+EDGE_CASES = {
+    "quoted_links": {
+        "personal_info": {"name": "Q", "email": 'q"x@example.com', "linkedin": 'https://example.com/in/q"x'},
+        "skills": {}
+    },
+    "string_entries": {
+        "personal_info": {"name": "S", "email": "s@example.com"},
+        "education": ["MIT"],
+        "experience": ["Acme Corp, 2020"],
+        "projects": ["Side project"],
+        "skills": {"languages": ["Python"]}
+    }
+}
+
+
+def pdf_content(pdf_bytes: bytes):
+    reader = PdfReader(BytesIO(pdf_bytes))
+    text = " ".join(page.extract_text() for page in reader.pages)
+    # Line breaking differs between the layout engines, and only ReportLab's bullet
+    # glyphs are extractable (as U+2022 or, from the standard font encoding, U+007F)
+    return len(reader.pages), re.sub(r"\s+", " ", re.sub("[\u2022\x7f]", "", text)).strip()
+
+
+@pytest.mark.parametrize("resume", [RESUME, *EDGE_CASES.values()], ids=["full", *EDGE_CASES])
+def test_backends_render_same_content(resume):
+    html_pages, html_text = pdf_content(main.render_resume(resume, "html"))
+    reportlab_pages, reportlab_text = pdf_content(main.render_resume(resume, "reportlab"))
+    assert reportlab_text == html_text
+    assert reportlab_pages == html_pages
+
+
+def test_long_resume_paginates_the_same():
+    resume = dict(RESUME, experience=RESUME["experience"] * 8, projects=RESUME["projects"] * 6)
+    html_pages, _ = pdf_content(main.render_resume(resume, "html"))
+    reportlab_pages, _ = pdf_content(main.render_resume(resume, "reportlab"))
+    assert html_pages > 1
+    assert reportlab_pages == html_pages
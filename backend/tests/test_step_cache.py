@@ -0,0 +1,112 @@
+import functools
+import json
+import re
+import sqlite3
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import analysis_store
+import main
+import scheduler
+from optimiser_agent import agent as optimiser
+
+RESUME = json.dumps({"personal_info": {"name": "Jane Doe", "email": "jane@example.com"}, "skills": {"languages": ["Python"]}})
+JOB_DESCRIPTION = "Backend engineer: Python, FastAPI, PostgreSQL, Kubernetes."
+
+
+class FakeAdkServer:
+    """
+    Stands in for the ADK API server. Session state is taken from the request the
+    way ADK does it, and /run drives the optimiser's real skip callbacks and save tool.
+    """
+    def __init__(self):
+        self.sessions = {}
+        self.init_requests = []
+        self.ran_steps = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        session_path = re.fullmatch(r"/apps/[^/]+/users/[^/]+/sessions(?:/([^/]+))?", request.url.path)
+        if session_path:
+            self.init_requests.append((request.url.path, body))
+            if session_path.group(1):
+                # create_session_with_id: the whole body is the state
+                session_id, state = session_path.group(1), body
+            else:
+                session_id, state = body.get("session_id"), body.get("state") or {}
+            self.sessions[session_id] = dict(state)
+            return httpx.Response(200, json={"id": session_id})
+        if request.url.path == "/run":
+            self.run_chain(body)
+            return httpx.Response(200, json=[])
+        return httpx.Response(404)
+
+    def run_chain(self, body: dict):
+        context = SimpleNamespace(state=self.sessions[body["sessionId"]])
+        prompt = body["newMessage"]["parts"][0]["text"]
+        application_id = int(re.search(r"APPLICATION ID: (\d+)", prompt).group(1))
+        for step_name in analysis_store.STEP_COLUMNS:
+            if optimiser.skip_if_unchanged(step_name)(context) is None:
+                self.ran_steps.append(step_name)
+                result = optimiser.save_analysis_step(application_id, step_name, json.dumps({"step": step_name}), context)
+                assert result.startswith("SUCCESS"), result
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    db_path = tmp_path / "hiredly.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    monkeypatch.setattr(main, "llm_scheduler", scheduler.Scheduler())
+    monkeypatch.setattr(optimiser, "_connect", lambda: sqlite3.connect(db_path))
+    main.run_migrations()
+
+    adk = FakeAdkServer()
+    monkeypatch.setattr(main.httpx, "AsyncClient",
+                        functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(adk.handle)))
+
+    db = main.SessionLocal()
+    user = main.User(email="jane@example.com", hashed_password="x", resume_data=RESUME)
+    db.add(user)
+    db.commit()
+    jd = main.get_or_create_job_description(db, JOB_DESCRIPTION)
+    application = main.Application(user_id=user.id, company_name="Acme", role="Backend", status="Applied",
+                                   job_description_id=jd.id)
+    db.add(application)
+    db.commit()
+    ids = SimpleNamespace(user=user.id, application=application.id, jd_hash=jd.content_hash)
+    db.close()
+
+    with TestClient(main.app) as client:
+        yield SimpleNamespace(client=client, adk=adk, ids=ids)
+
+
+def analyze(backend):
+    response = backend.client.post("/api/analyze_application", json={"application_id": backend.ids.application})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_init_session_seeds_step_cache_state(backend):
+    analyze(backend)
+
+    path, body = backend.adk.init_requests[0]
+    assert path == f"/apps/optimiser_agent/users/{backend.ids.user}/sessions"
+    assert body["session_id"] in backend.adk.sessions
+    assert body["state"]["base_input_hash"] == analysis_store.base_input_hash(RESUME, backend.ids.jd_hash)
+    assert backend.adk.ran_steps == list(analysis_store.STEP_COLUMNS)
+
+
+def test_unchanged_reanalysis_is_up_to_date(backend):
+    first = analyze(backend)
+    assert first["stale_steps"] == list(analysis_store.STEP_COLUMNS)
+
+    second = analyze(backend)
+    assert second == {"message": "Analysis is up to date", "stale_steps": []}
+    assert len(backend.adk.init_requests) == 1
@@ -1,11 +1,12 @@
 import React, { useState, useEffect } from 'react';
-import { useParams, useNavigate } from 'react-router-dom';
-import { ArrowLeft, CheckCircle, AlertCircle, FileText, Play, BookOpen, Wand2, Download, ExternalLink, Loader2, ChevronDown } from 'lucide-react';
+import { useParams, useNavigate, useLocation } from 'react-router-dom';
+import { ArrowLeft, CheckCircle, AlertCircle, FileText, Play, BookOpen, Wand2, Download, ExternalLink, Loader2, ChevronDown, RefreshCw } from 'lucide-react';
 import AuthenticatedNavbar from '../components/AuthenticatedNavbar';
 
 function ApplicationDetailPage() {
     const { id } = useParams();
     const navigate = useNavigate();
+    const location = useLocation();
 
     const [application, setApplication] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
@@ -15,6 +16,10 @@ function ApplicationDetailPage() {
     const [resourceData, setResourceData] = useState(null);
     const [resumeData, setResumeData] = useState(null);
 
+    // Set when the results were reused from an application with a near-identical JD
+    const [similarReuse, setSimilarReuse] = useState(location.state?.similarTo ? location.state : null);
+    const [isReanalyzing, setIsReanalyzing] = useState(false);
+
     useEffect(() => {
         fetchApplicationDetails();
     }, [id]);
@@ -24,19 +29,19 @@ function ApplicationDetailPage() {
             const userId = localStorage.getItem('user_id');
             if (!userId) return;
 
-            const res = await fetch(`http://localhost:8000/api/applications/${userId}`);
+            const res = await fetch(`http://localhost:8000/api/applications/${id}/detail`);
             if (res.ok) {
-                const apps = await res.json();
-                const app = apps.find(a => a.id === parseInt(id));
+                const app = await res.json();
 
                 if (app) {
                     setApplication(app);
 
-                    // Parse JSON columns safely
-                    try { setAtsData(JSON.parse(app.ats_score_data || 'null')); } catch (e) { }
-                    try { setSkillData(JSON.parse(app.skill_gap_data || 'null')); } catch (e) { }
-                    try { setResourceData(JSON.parse(app.resource_data || 'null')); } catch (e) { }
-                    try { setResumeData(JSON.parse(app.enhanced_resume_data || 'null')); } catch (e) { }
+                    // Analysis results arrive as embedded JSON; tolerate string-encoded values too
+                    const parseResult = (value) => typeof value === 'string' ? JSON.parse(value) : (value ?? null);
+                    try { setAtsData(parseResult(app.ats_score_data)); } catch (e) { }
+                    try { setSkillData(parseResult(app.skill_gap_data)); } catch (e) { }
+                    try { setResourceData(parseResult(app.resource_data)); } catch (e) { }
+                    try { setResumeData(parseResult(app.enhanced_resume_data)); } catch (e) { }
                 }
             }
         } catch (error) {
@@ -64,6 +69,24 @@ function ApplicationDetailPage() {
         }
     };
 
+    const handleFreshAnalysis = async () => {
+        setIsReanalyzing(true);
+        try {
+            const res = await fetch('http://localhost:8000/api/analyze_application', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ application_id: application.id, fresh: true })
+            });
+            if (!res.ok) throw new Error('Analysis failed');
+            setSimilarReuse(null);
+            await fetchApplicationDetails();
+        } catch (error) {
+            console.error("Fresh analysis failed:", error);
+        } finally {
+            setIsReanalyzing(false);
+        }
+    };
+
     const handleDownloadPDF = async () => {
         try {
             const res = await fetch(`http://localhost:8000/api/generate_pdf/${application.id}`, {
@@ -166,6 +189,24 @@ function ApplicationDetailPage() {
                         </div>
                     </div>
 
+                    {similarReuse && (
+                        <div className="flex items-center gap-4 bg-blue-500/10 border border-blue-500/30 rounded-2xl px-6 py-4">
+                            <AlertCircle size={20} className="text-blue-400 shrink-0" />
+                            <p className="text-sm text-gray-300 flex-1">
+                                This job description is {Math.round(similarReuse.similarity * 100)}% similar to one you analyzed before,
+                                so its ATS score, skill gaps and resources are shown here. Run a fresh analysis for results (and an enhanced resume) specific to this posting.
+                            </p>
+                            <button
+                                onClick={handleFreshAnalysis}
+                                disabled={isReanalyzing}
+                                className="px-4 py-2 bg-blue-600 hover:bg-blue-500 disabled:opacity-50 text-white rounded-xl text-sm font-bold transition-all flex items-center gap-2"
+                            >
+                                {isReanalyzing ? <Loader2 size={16} className="animate-spin" /> : <RefreshCw size={16} />}
+                                Run fresh analysis
+                            </button>
+                        </div>
+                    )}
+
                     <div className="grid grid-cols-1 lg:grid-cols-3 gap-8">
 
                         {/* LEFT COLUMN - ATS & RESUME */}
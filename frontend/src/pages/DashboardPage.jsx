@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Plus, X, Loader2, Trash2, AlertTriangle } from 'lucide-react';
+import { Plus, X, Loader2, Trash2, AlertTriangle, Download, Search } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import AuthenticatedNavbar from '../components/AuthenticatedNavbar';
 import CalendarWidget from '../components/CalendarWidget';
@@ -22,15 +22,30 @@ function DashboardPage() {
         job_description: ''
     });
 
+    // Search State
+    const [searchQuery, setSearchQuery] = useState('');
+
     useEffect(() => {
-        fetchApplications();
-    }, []);
+        // Debounce typing; an empty query lists everything
+        const timer = setTimeout(() => fetchApplications(searchQuery), searchQuery ? 250 : 0);
+        return () => clearTimeout(timer);
+    }, [searchQuery]);
 
-    const fetchApplications = async () => {
+    const fetchApplications = async (query = searchQuery) => {
         const userId = localStorage.getItem('user_id');
         if (!userId) return;
 
         try {
+            if (query.trim()) {
+                const params = new URLSearchParams({ q: query, page_size: '50' });
+                const res = await fetch(`http://localhost:8000/api/applications/${userId}/search?${params}`);
+                if (res.ok) {
+                    const data = await res.json();
+                    setApplications(data.results);
+                }
+                return;
+            }
+
             const res = await fetch(`http://localhost:8000/api/applications/${userId}`);
             if (res.ok) {
                 const data = await res.json();
@@ -74,8 +89,11 @@ function DashboardPage() {
                     });
 
                     if (analyzeRes.ok) {
-                        // Success -> Redirect to Detail Page
-                        navigate(`/applications/${createdApp.id}`);
+                        // Success -> Redirect to Detail Page (with reuse info if a near-identical JD was found)
+                        const analysis = await analyzeRes.json();
+                        navigate(`/applications/${createdApp.id}`, {
+                            state: analysis.similar_to ? { similarTo: analysis.similar_to, similarity: analysis.similarity } : null
+                        });
                     } else {
                         console.error("Analysis failed to start");
                         // Still redirect, maybe show error on detail page later
@@ -122,6 +140,37 @@ function DashboardPage() {
         }
     };
 
+    // Bulk Export State
+    const [isExporting, setIsExporting] = useState(false);
+
+    const handleExportAll = async () => {
+        const userId = localStorage.getItem('user_id');
+        if (!userId) return;
+        setIsExporting(true);
+        try {
+            const res = await fetch('http://localhost:8000/api/export_pdfs', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ user_id: parseInt(userId) })
+            });
+
+            if (!res.ok) throw new Error('Export failed');
+
+            const blob = await res.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = 'Optimized_Resumes.zip';
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(url);
+        } catch (error) {
+            console.error("Failed to export resumes:", error);
+        } finally {
+            setIsExporting(false);
+        }
+    };
+
     return (
         <div className="flex flex-col h-full relative">
             <AuthenticatedNavbar
@@ -135,13 +184,35 @@ function DashboardPage() {
                     <div className="bg-gray-900/50 backdrop-blur-md border border-gray-800 rounded-3xl p-10 shadow-xl min-h-[700px]">
                         <div className="flex justify-between items-center mb-8">
                             <h2 className="text-2xl font-bold">Your Applications</h2>
-                            <button
-                                onClick={() => setIsModalOpen(true)}
-                                className="px-5 py-2.5 bg-blue-600 hover:bg-blue-500 text-white text-sm font-semibold rounded-xl shadow-lg shadow-blue-500/20 transition-all flex items-center gap-2"
-                            >
-                                New Application
-                                <Plus size={18} />
-                            </button>
+                            <div className="flex items-center gap-3">
+                                <div className="relative">
+                                    <Search size={16} className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-500" />
+                                    <input
+                                        type="text"
+                                        value={searchQuery}
+                                        onChange={(e) => setSearchQuery(e.target.value)}
+                                        placeholder="Search applications..."
+                                        className="pl-9 pr-4 py-2.5 bg-gray-800 border border-gray-700 rounded-xl text-sm text-white placeholder-gray-500 focus:outline-none focus:border-blue-500"
+                                    />
+                                </div>
+                                {applications.length > 0 && (
+                                    <button
+                                        onClick={handleExportAll}
+                                        disabled={isExporting}
+                                        className="px-5 py-2.5 bg-gray-800 hover:bg-gray-700 text-white text-sm font-semibold rounded-xl transition-all flex items-center gap-2 disabled:opacity-50"
+                                    >
+                                        Export All
+                                        {isExporting ? <Loader2 size={18} className="animate-spin" /> : <Download size={18} />}
+                                    </button>
+                                )}
+                                <button
+                                    onClick={() => setIsModalOpen(true)}
+                                    className="px-5 py-2.5 bg-blue-600 hover:bg-blue-500 text-white text-sm font-semibold rounded-xl shadow-lg shadow-blue-500/20 transition-all flex items-center gap-2"
+                                >
+                                    New Application
+                                    <Plus size={18} />
+                                </button>
+                            </div>
                         </div>
 
                         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">